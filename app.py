@@ -1,15 +1,63 @@
-from flask import Flask
-import src.update_script as us
+from flask import Flask, Response, jsonify, request, url_for
+import config
+import src.jobs as jobs
+import src.metrics as metrics
+import src.targets as tg
 
 app = Flask(__name__)
 
+def _submit(**kwargs):
+    try:
+        job, created = jobs.submit(**kwargs)
+    except Exception as e:
+        return jsonify(error=f"{e}"), 500
+    return jsonify(
+        job_id=job["id"],
+        state=job["state"],
+        merged=not created,
+        status_url=url_for("job_status", job_id=job["id"]) if job["id"] else None,
+    ), 202
+
 @app.route("/")
 def update_plots():
+    """
+    Zleca aktualizację w tle i od razu odpowiada 202 z id zadania.
+    Jeśli aktualizacja już trwa, żądanie dołącza do niej (ten sam job id), a jeśli trwa
+    tylko częściowa (/update/...), pełna czeka w kolejce i rusza zaraz po niej.
+    """
+    return _submit()
+
+@app.route("/update/", defaults={"targets": ""})
+@app.route("/update/<targets>")
+def update_targets(targets):
+    """
+    Aktualizacja tylko wybranych artefaktów albo zakładek, po przecinku:
+    /update/wyceny_tab,portfolio_vs_wig - pobierane są tylko ich zakładki.
+    ?dry_run=1 zwraca sam plan (zakładki do pobrania, artefakty do renderowania) bez uruchamiania.
+    Nieznana nazwa albo pusta lista (także samo /update/): 400. Nazwy sprawdza src.targets
+    (sam config), więc odpowiedź nie czeka na import pandas/plotly. Gdy trwa aktualizacja, która tych celów
+    nie obejmuje, zadanie czeka w kolejce i rusza zaraz po niej (patrz jobs.submit).
+    """
+    names = [name for name in targets.split(",") if name]
     try:
-        us.run_update() 
-        return "Plots updated successfully!"
-    except Exception as e:
-        return f"ERROR: {e}"
+        plans = tg.portfolio_plan(names) if config.PORTFOLIOS else tg.plan(names)
+    except ValueError as e:
+        return jsonify(error=f"{e}"), 400
+    if request.args.get("dry_run"):
+        return jsonify(plan=plans)
+    return _submit(targets=names)
+
+@app.route("/status/<job_id>")
+def job_status(job_id):
+    job = jobs.get_status(job_id)
+    if job is None:
+        return jsonify(error="unknown job id"), 404
+    return jsonify(job)
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Czasy i rozmiary z ostatniego uruchomienia (pobrania, renderowanie, etapy) dla Prometheusa."""
+    return Response(metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
 
 # WSGI callable for SEOHost
 application = app
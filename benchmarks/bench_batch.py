@@ -0,0 +1,99 @@
+"""
+Benchmark: aktualizacja N portfeli po kolei (run_update dla każdego, jak osobne procesy
+uruchamiane jeden po drugim - bez kosztu startu procesu i importów) vs src.batch.run_batch
+(jeden graf na wspólnych pulach). Każdy portfel ma własne zakładki z benchmarks/synthetic.py
+(inne ziarno), serwowane przez lokalny zamiennik Google Sheets (benchmarks/fake_sheets.py).
+Mierzony jest pierwszy przebieg (wszystko do przebudowania) i drugi (bez zmian w arkuszach).
+
+    python -m benchmarks.bench_batch [--portfolios 50] [--rows 300] [--latency 0.05]
+"""
+import os
+import io
+import sys
+import time
+import atexit
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# względne ścieżki z config.py (cache/, log/) lądują w katalogu tymczasowym
+WORKDIR = tempfile.mkdtemp(prefix="hossa-bench-batch-")
+os.chdir(WORKDIR)
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+
+import config
+config.LOG_STDOUT = False
+config.TAB_CACHE_TTL = {"default": 0}
+
+import src.update_script as us
+import src.batch as batch
+from benchmarks import fake_sheets
+from benchmarks.synthetic import make_sheet
+
+def make_portfolios(n, rows):
+    """({gid: DataFrame} wszystkich portfeli, {nazwa: spec jak w config.PORTFOLIOS})."""
+    tabs, portfolios = {}, {}
+    for i in range(n):
+        gids = {}
+        for j, (name, df) in enumerate(make_sheet(rows, seed=i).items()):
+            gid = str(i * 10 + j)
+            tabs[gid] = df
+            gids[name] = gid
+        portfolios[f"p{i:03d}"] = {"sheetId": f"sheet{i}", "folder": os.path.join(WORKDIR, "sites", f"p{i:03d}"),
+                                   "gids": gids}
+    return tabs, portfolios
+
+def sequential(portfolios, root):
+    for name, spec in portfolios.items():
+        os.environ["sheetId"] = spec["sheetId"]
+        us.gids = spec["gids"]
+        us.output_path = os.path.join(root, name)
+        us.run_update()
+
+def reset():
+    shutil.rmtree(os.path.join(WORKDIR, config.CACHE_FOLDER), ignore_errors=True)
+
+def timed(func):
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        result = func()
+        return time.perf_counter() - t0, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--portfolios", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=300, help="liczba wierszy zakładek")
+    parser.add_argument("--latency", type=float, default=0.05, help="opóźnienie odpowiedzi serwera [s]")
+    args = parser.parse_args()
+
+    config.SNAPSHOTS = False
+    tabs, portfolios = make_portfolios(args.portfolios, args.rows)
+    config.PORTFOLIOS = portfolios
+    with fake_sheets.serve(tabs, latency=args.latency) as base_url:
+        config.SHEETS_BASE_URL = base_url
+
+        reset()
+        root = os.path.join(WORKDIR, "sequential")
+        cold_seq, _ = timed(lambda: sequential(portfolios, root))
+        warm_seq, _ = timed(lambda: sequential(portfolios, root))
+
+        reset()
+        cold_batch, summary = timed(lambda: batch.run_batch())
+        warm_batch, _ = timed(lambda: batch.run_batch())
+
+    print(f"{args.portfolios} portfolios x {args.rows} rows, latency {args.latency * 1000:.0f} ms "
+          f"(FETCH_WORKERS={config.FETCH_WORKERS}, BATCH_FETCH_WORKERS={config.BATCH_FETCH_WORKERS}, "
+          f"RENDER_WORKERS={config.RENDER_WORKERS})")
+    print(f"{'':<12} {'sequential':>12} {'batch':>12}")
+    print(f"{'first run':<12} {cold_seq:11.2f}s {cold_batch:11.2f}s  ({cold_seq / cold_batch:.1f}x)")
+    print(f"{'no changes':<12} {warm_seq:11.2f}s {warm_batch:11.2f}s  ({warm_seq / warm_batch:.1f}x)")
+    print(f"batch: {len(summary['rebuilt'])} artifacts rebuilt, {len(summary['failed'])} failed, "
+          f"error: {summary['error']}")
+    return 1 if summary["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
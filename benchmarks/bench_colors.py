@@ -0,0 +1,100 @@
+"""
+Benchmark: src.colors (numpy) vs. poprzednia implementacja (pętla + colorsys,
+colormap z matplotlib). Sprawdza, że kolory są identyczne.
+
+    python -m benchmarks.bench_colors [liczba_wartości ...]
+"""
+import sys
+import time
+import colorsys
+
+import numpy as np
+import pandas as pd
+
+import src.colors as c
+import src.utils as u
+
+# --- dawna implementacja (kopia) ---
+def legacy_lighten_color(hex_color, amount=0.4):
+    hex_color = hex_color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
+    l = min(1, l + amount * (1 - l))
+    r, g, b = colorsys.hls_to_rgb(h, l, s)
+    return '#{:02x}{:02x}{:02x}'.format(int(r*255), int(g*255), int(b*255))
+
+def legacy_interpolate_color(c1, c2, t):
+    c1 = c1.lstrip('#')
+    c2 = c2.lstrip('#')
+    r1, g1, b1 = tuple(int(c1[i:i+2], 16) for i in (0, 2, 4))
+    r2, g2, b2 = tuple(int(c2[i:i+2], 16) for i in (0, 2, 4))
+    r = int(r1 + (r2 - r1) * t)
+    g = int(g1 + (g2 - g1) * t)
+    b = int(b1 + (b2 - b1) * t)
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+def legacy_positive_negative_colors(colors, values):
+    neg_color, pos_color = colors
+    min_val = min(values)
+    max_val = max(values)
+    neg_light = legacy_lighten_color(neg_color, 0.5)
+    pos_light = legacy_lighten_color(pos_color, 0.5)
+    new_colors = []
+    for v in values:
+        if v < 0:
+            t = v / min_val if min_val != 0 else 1
+            new_colors.append(legacy_interpolate_color(neg_light, neg_color, t))
+        else:
+            t = v / max_val if max_val != 0 else 1
+            t = 1 - t
+            new_colors.append(legacy_interpolate_color(pos_color, pos_light, t))
+    return new_colors
+
+def legacy_generate_colors(df, col_name, colors_list):
+    import matplotlib.colors as mcolors
+    import matplotlib.pyplot as plt
+    df[col_name] = u.str2float(df[col_name])
+    values = df[col_name]
+    cmap = mcolors.LinearSegmentedColormap.from_list("custom", colors_list)
+    norm = plt.Normalize(values.min(), values.max())
+    return [mcolors.to_hex(x) for x in cmap(norm(values))]
+
+def timeit(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(sizes):
+    bar_colors = ['#852029', '#304536']
+    gradient = ['#ddeedd', '#224422']
+    # kilka kolorów, żeby sprawdzić też ścieżkę HLS
+    for col in bar_colors + ['#ffffff', '#000000', '#5D6C61', '#a6a6a6', '#ddeedd']:
+        assert c.lighten_color(col, 0.5) == legacy_lighten_color(col, 0.5), col
+
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        values = rng.normal(2, 15, n).round(2)
+        df = pd.DataFrame({"v": values})
+
+        same_bars = c.positive_negative_colors(bar_colors, values) == \
+            legacy_positive_negative_colors(bar_colors, values)
+        t_old = timeit(lambda: legacy_positive_negative_colors(bar_colors, values))
+        t_new = timeit(lambda: c.positive_negative_colors(bar_colors, values))
+        print(f"positive_negative_colors {n:>7}: legacy {t_old * 1000:8.2f} ms | new {t_new * 1000:7.2f} ms "
+              f"| x{t_old / t_new:6.1f} | {'identical' if same_bars else 'DIFFERENT'}")
+
+        try:
+            legacy = legacy_generate_colors(df.copy(), "v", gradient)
+        except ImportError:
+            continue  # bez matplotlib porównujemy tylko słupki
+        same_grad = c.generate_colors(df.copy(), "v", gradient)[0] == legacy
+        t_old = timeit(lambda: legacy_generate_colors(df.copy(), "v", gradient))
+        t_new = timeit(lambda: c.generate_colors(df.copy(), "v", gradient))
+        print(f"generate_colors          {n:>7}: legacy {t_old * 1000:8.2f} ms | new {t_new * 1000:7.2f} ms "
+              f"| x{t_old / t_new:6.1f} | {'identical' if same_grad else 'DIFFERENT'}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 1000, 10000])
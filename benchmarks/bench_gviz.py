@@ -0,0 +1,62 @@
+"""
+Benchmark: odczyt zakładki przez gviz out:html + BeautifulSoup (u.scrapeDataFromSpreadsheetHtml)
+vs. gviz out:json (u.scrapeDataFromSpreadsheet - tekst, u.scrapeGvizFromSpreadsheet - typy kolumn).
+Zakładki z benchmarks/synthetic.py serwuje lokalny zamiennik Google Sheets (benchmarks/fake_sheets.py).
+Podaje czas, szczytowe zużycie pamięci (tracemalloc) i porównanie tekstu z obu ścieżek komórka
+po komórce: gviz out:json zwraca null (tu "") dla komórek innego typu niż większość kolumny
+(np. "-" w kolumnie liczb), które out:html pokazuje tak jak w arkuszu.
+
+    python -m benchmarks.bench_gviz [liczba_wierszy ...]
+"""
+import sys
+import time
+import tracemalloc
+
+import config
+import src.utils as u
+from benchmarks import fake_sheets
+from benchmarks.synthetic import make_tab
+
+TABS = ("wyceny", "wig")
+
+def measure(func, repeat=3):
+    """(najlepszy czas, szczyt pamięci w bajtach, wynik)"""
+    func()  # serwer generuje odpowiedź przy pierwszym zapytaniu - tego nie mierzymy
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, result
+
+def compare(html, text) -> str:
+    """Porównanie surowych DataFrame obu ścieżek - bez wyrównywania różnic."""
+    if html.shape != text.shape or list(html.columns) != list(text.columns):
+        return f"DIFFERENT shape {html.shape} vs {text.shape}"
+    diff = html.ne(text).to_numpy()
+    if not diff.any():
+        return "identical"
+    blanked = (diff & text.eq("").to_numpy()).sum()
+    return f"DIFFERENT in {diff.sum()} cells ({blanked} shown in html, empty in json)"
+
+def main(sizes):
+    for n in sizes:
+        tabs = {str(i): make_tab(name, n) for i, name in enumerate(TABS)}
+        with fake_sheets.serve(tabs) as base_url:
+            config.SHEETS_BASE_URL = base_url
+            for gid, name in enumerate(TABS):
+                repeat = 1 if n > 20000 else 3
+                t_html, m_html, html = measure(lambda: u.scrapeDataFromSpreadsheetHtml("bench", gid), repeat)
+                t_json, m_json, text = measure(lambda: u.scrapeDataFromSpreadsheet("bench", gid), repeat)
+                t_typed, m_typed, _ = measure(lambda: u.scrapeGvizFromSpreadsheet("bench", gid), repeat)
+                print(f"{name:>7} {n:>7} rows: html {t_html * 1000:9.1f} ms {m_html / 1e6:7.1f} MB"
+                      f" | json {t_json * 1000:8.1f} ms {m_json / 1e6:6.1f} MB (x{t_html / t_json:5.1f})"
+                      f" | typed {t_typed * 1000:8.1f} ms {m_typed / 1e6:6.1f} MB (x{t_html / t_typed:5.1f})"
+                      f" | text {compare(html, text)}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100, 1000, 10000, 100000])
@@ -0,0 +1,49 @@
+"""
+Czas zimnego startu: `python -X importtime -c "import <moduł>"` dla app
+(to, co ładuje Passenger przy starcie workera) i src.update_script.
+
+Kończy się kodem 1, jeśli import app wciąga którąś z ciężkich bibliotek
+albo src.update_script wciąga matplotlib.
+
+    python -m benchmarks.bench_import
+"""
+import sys
+import subprocess
+
+HEAVY = ("pandas", "numpy", "plotly", "matplotlib", "bs4", "lxml", "requests")
+
+# moduł -> biblioteki, których jego import nie może ładować
+CHECKS = {
+    "app": HEAVY,
+    "src.update_script": ("matplotlib",),
+}
+
+def importtime(module):
+    """Zwraca {moduł: skumulowany czas importu w µs} z -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def main():
+    failed = False
+    for module, forbidden in CHECKS.items():
+        times = importtime(module)
+        loaded = sorted({name.split(".")[0] for name in times} & set(forbidden))
+        top = sorted(((t, n) for n, t in times.items() if "." not in n and n != module), reverse=True)[:5]
+        print(f"{module}: {times[module] / 1000:.1f} ms")
+        print("   slowest top-level imports: " + ", ".join(f"{n} {t / 1000:.1f} ms" for t, n in top))
+        if loaded:
+            failed = True
+            print(f"   FAIL: imports {', '.join(loaded)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
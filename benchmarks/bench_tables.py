@@ -0,0 +1,88 @@
+"""
+Benchmark: plots.table2html / vals2html vs. poprzednia implementacja
+(html += ... w pętli df.iterrows()). Sprawdza też, że wynik jest identyczny bajt w bajt.
+
+    python -m benchmarks.bench_tables [liczba_wierszy ...]
+"""
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import src.plots as plots
+
+def legacy_rows(df, link=None):
+    # dokładna kopia dawnej pętli z table2html/vals2html
+    html = ""
+    link_idx = None
+    if link and link in df.columns:
+        link_idx = df.columns.get_loc(link)
+    for i, col in enumerate(df.columns):
+        if i == link_idx:
+            continue
+        html += f"<th>{col}</th>"
+    html += "</tr></thead><tbody>"
+    for _, row in df.iterrows():
+        html += "<tr>"
+        for i, (col, val) in enumerate(row.items()):
+            if i == link_idx:
+                continue
+            if link_idx and i == link_idx - 1:
+                url = row.iloc[link_idx]
+                html += f'<td><a href="{url}" target="_blank">{val}</a></td>'
+            else:
+                html += f"<td>{val}</td>"
+        html += "</tr>"
+    return html
+
+def legacy_table2html(df, title, fontsize=14, link=None, path=""):
+    # nagłówek/stopka z nowej wersji, pętla ze starej - porównujemy tylko część z wierszami
+    new_path = os.path.join(path, f"{title}.html")
+    plots.table2html(df, title=title, fontsize=fontsize, link=link, path=path)
+    with open(new_path, encoding="utf-8") as f:
+        new = f.read()
+    start = new.index("<th>")
+    end = new.index("</tbody>")
+    old = new[:start] + legacy_rows(df, link) + new[end:]
+    return old
+
+def synthetic(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Nazwa": [f"Spółka {i}" for i in range(n)],
+        "Kurs": [f"{v:.2f}".replace(".", ",") for v in rng.uniform(1, 500, n)],
+        "Stopa zwrotu": [f"{v:.2f}%".replace(".", ",") for v in rng.normal(5, 20, n)],
+        "DCF": rng.uniform(1, 500, n).round(2),
+        "link (hidden)": [f"https://example.com/wycena/{i}" for i in range(n)],
+        "Komentarz": ["" if i % 3 else "kupuj" for i in range(n)],
+    })
+
+def timeit(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = synthetic(n)
+            new_path = os.path.join(tmp, "bench.html")
+
+            t_new = timeit(lambda: plots.table2html(df, title="bench", link="link (hidden)", path=tmp))
+            with open(new_path, encoding="utf-8") as f:
+                new = f.read()
+            t_old = timeit(lambda: legacy_rows(df, "link (hidden)"), repeat=1 if n > 5000 else 3)
+            old = legacy_table2html(df, "bench", link="link (hidden)", path=tmp)
+
+            same = "identical" if old == new else "DIFFERENT"
+            print(f"{n:>7} rows: legacy {t_old * 1000:9.1f} ms | new {t_new * 1000:8.1f} ms "
+                  f"| x{t_old / t_new:6.1f} | output {same}")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10, 100, 1000, 10000, 50000])
@@ -0,0 +1,242 @@
+"""
+Lokalny zamiennik Google Sheets dla benchmarków:
+- /spreadsheets/d/<id>/export?format=csv&gid=<gid>     (eksport CSV)
+- /spreadsheets/u/0/d/<id>/gviz/tq?tqx=out:html|json|csv&tq=<zapytanie>&gid=<gid>
+  (gviz: tabela HTML, JSONP z typami, CSV; zapytanie: select / where ... is not null, >= date / limit)
+
+Opóźnienie każdej odpowiedzi (`latency`) i liczba odpowiedzi "Ładuję..." przed
+właściwymi danymi (`loading`, per gid) są ustawiane przy starcie serwera.
+
+    with serve({gid: DataFrame}, latency=0.05, loading={gid: 2}) as base_url:
+        config.SHEETS_BASE_URL = base_url
+"""
+import io
+import re
+import csv
+import sys
+import json
+import time
+import threading
+from html import escape
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.synthetic import csv_bytes
+
+LOADING = "Ładuję..."
+
+_bodies = {}
+_bodies_lock = threading.Lock()
+
+class SheetsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, jak Google
+    disable_nagle_algorithm = True  # nagłówki i treść idą osobnymi write() - bez tego +40 ms (delayed ACK)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        gid = query.get("gid", [""])[0]
+        df = server.tabs.get(gid)
+        if df is None:
+            return self._send(404, b"unknown gid", "text/plain")
+
+        tq = ""
+        if url.path.endswith("/export"):
+            out = "csv"
+        elif url.path.endswith("/gviz/tq"):
+            out = "gviz_" + query.get("tqx", ["out:html"])[0].removeprefix("out:")
+            tq = query.get("tq", [""])[0]
+        else:
+            out = None
+        if out not in FORMATS:
+            return self._send(404, b"not found", "text/plain")
+
+        with server.lock:
+            server.requests[gid] = server.requests.get(gid, 0) + 1
+            loading = server.requests[gid] <= server.loading.get(gid, 0)
+        time.sleep(server.latency)
+        render, content_type = FORMATS[out]
+        try:
+            body = server.body(gid, out, tq, loading, render)
+        except QueryError as e:
+            return self._send(400, str(e).encode("utf-8"), "text/plain; charset=utf-8")
+        self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class SheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def body(self, gid, out, tq, loading, render):
+        # odpowiedź generowana raz na (zakładka, format, zapytanie, 'Ładuję...') - także między
+        # kolejnymi serwerami z tymi samymi danymi - żeby mierzyć klienta, a nie serwer
+        df = self.tabs[gid]
+        key = (id(df), out, tq, loading)
+        with _bodies_lock:
+            cached = _bodies.get(key)
+        if cached is None:
+            source = df
+            if loading:
+                df = df.copy()
+                df.iloc[0, min(1, df.shape[1] - 1)] = LOADING
+            cached = (source, render(df, tq))  # trzymamy DataFrame, żeby id() nie zostało użyte ponownie
+            with _bodies_lock:
+                _bodies[key] = cached
+        return cached[1]
+
+    def handle_error(self, request, client_address):
+        # klient przerywający pobieranie (np. po wykryciu 'Ładuję...') to nie błąd serwera
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+NUMBER = r"^(-?\d+(?:,\d+)?)(%| zł)?$"
+DATE = r"^(\d{4})-(\d{2})-(\d{2})(?: (\d{2}):(\d{2}))?$"
+
+def gviz_column(series):
+    """(typ kolumny, komórki) jak w gviz: liczby / daty z wartością "v" i sformatowanym "f"."""
+    text = series.astype(str).replace("nan", "")
+    filled = text[text != ""]
+    # typ kolumny: ten, który pasuje do większości niepustych komórek (jak w Google);
+    # komórki innego typu są puste (null) - także 'Ładuję...' w kolumnie liczb czy dat
+    numbers = filled.str.extract(NUMBER)
+    if len(filled) and numbers[0].notna().mean() > 0.5:
+        m = text.str.extract(NUMBER)
+        v = m[0].str.replace(",", ".", regex=False).astype(float)
+        v = v.where(m[1] != "%", v / 100)
+        return "number", [None if f != f else {"v": x, "f": t} for x, f, t in zip(v, m[0], text)]
+    dates = filled.str.extract(DATE)
+    if len(filled) and dates[0].notna().mean() > 0.5:
+        m = text.str.extract(DATE).astype(float)
+        has_time = m[3].notna().any()
+        cells = []
+        for (y, mo, d, h, mi), t in zip(m.itertuples(index=False, name=None), text):
+            if y != y:
+                cells.append(None)
+                continue
+            args = [int(y), int(mo) - 1, int(d)] + ([int(h), int(mi), 0] if has_time else [])
+            cells.append({"v": f"Date({','.join(map(str, args))})", "f": t})
+        return ("datetime" if has_time else "date"), cells
+    return "string", [{"v": t} if t else None for t in text]
+
+class QueryError(Exception):
+    pass
+
+SELECT = re.compile(r"^\s*select\s+(\*|[A-Z]+(?:\s*,\s*[A-Z]+)*)(?:\s+where\s+(.+?))?(?:\s+limit\s+(\d+))?\s*$",
+                    re.IGNORECASE)
+NOT_NULL = re.compile(r"^\s*([A-Z]+)\s+is\s+not\s+null\s*$", re.IGNORECASE)
+COMPARE = re.compile(r"^\s*([A-Z]+)\s*(>=|<=|>|<|=)\s*(date|datetime)\s+'([^']+)'\s*$", re.IGNORECASE)
+GVIZ_DATE = re.compile(r"Date\(([\d,]+)\)")
+OPERATORS = {">=": tuple.__ge__, "<=": tuple.__le__, ">": tuple.__gt__, "<": tuple.__lt__, "=": tuple.__eq__}
+
+def date_key(cell):
+    # komórka gviz {"v": "Date(2024,0,2)"} -> (2024, 1, 2, 0, 0, 0); pusta / nie-data -> None
+    m = GVIZ_DATE.match(str(cell["v"])) if cell else None
+    if not m:
+        return None
+    parts = [int(p) for p in m.group(1).split(",")] + [0, 0, 0]
+    return (parts[0], parts[1] + 1, *parts[2:6])
+
+def column_id(i):
+    return chr(65 + i) if i < 26 else f"A{chr(65 + i - 26)}"
+
+def gviz_query(df, tq):
+    """
+    (kolumny gviz, komórki w wierszach) po zapytaniu `tq` - obsługiwany podzbiór języka zapytań:
+    select * | A,B,...  [where X is not null and X >= date 'YYYY-MM-DD' and ...]  [limit N]
+    (porównanie z datą tylko dla kolumn typu date/datetime, jak w Google)
+    """
+    kinds, columns = zip(*(gviz_column(df[col]) for col in df.columns)) if len(df.columns) else ((), ())
+    cols = [{"id": column_id(i), "label": str(col), "type": kind}
+            for i, (col, kind) in enumerate(zip(df.columns, kinds))]
+    rows = list(zip(*columns))
+    if not tq.strip():
+        return cols, rows
+    m = SELECT.match(tq)
+    if not m:
+        raise QueryError(f"Invalid query: {tq}")
+    ids = [col["id"] for col in cols]
+    def index(col_id):
+        if col_id.upper() not in ids:
+            raise QueryError(f"Invalid query: NO_COLUMN: {col_id}")
+        return ids.index(col_id.upper())
+    selected = (list(range(len(cols))) if m.group(1) == "*"
+                else [index(c.strip()) for c in m.group(1).split(",")])
+    if m.group(2):
+        for condition in re.split(r"\s+and\s+", m.group(2), flags=re.IGNORECASE):
+            if c := NOT_NULL.match(condition):
+                i = index(c.group(1))
+                rows = [row for row in rows if row[i] is not None]
+            elif c := COMPARE.match(condition):
+                i = index(c.group(1))
+                if cols[i]["type"] not in ("date", "datetime"):
+                    raise QueryError(f"Invalid query: Can't compare {cols[i]['type']} with {c.group(3)}")
+                value = tuple(int(p) for p in re.findall(r"\d+", c.group(4))) + (0, 0, 0)
+                value, compare = value[:6], OPERATORS[c.group(2)]
+                rows = [row for row in rows if (key := date_key(row[i])) is not None and compare(key, value)]
+            else:
+                raise QueryError(f"Invalid query: {tq}")
+    if m.group(3):
+        rows = rows[:int(m.group(3))]
+    return [cols[i] for i in selected], [[row[i] for i in selected] for row in rows]
+
+def gviz_json(df, tq="") -> bytes:
+    try:
+        cols, rows = gviz_query(df, tq)
+        table = {"cols": cols, "rows": [{"c": list(cells)} for cells in rows], "parsedNumHeaders": 1}
+        response = {"version": "0.6", "reqId": "0", "status": "ok", "sig": "0", "table": table}
+    except QueryError as e:
+        response = {"version": "0.6", "reqId": "0", "status": "error",
+                    "errors": [{"reason": "invalid_query", "message": "INVALID_QUERY", "detailed_message": str(e)}]}
+    body = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+    return f"/*O_o*/\ngoogle.visualization.Query.setResponse({body});".encode("utf-8")
+
+def gviz_csv(df, tq="") -> bytes:
+    # jak gviz out:csv: wartości sformatowane, wszystkie pola w cudzysłowach
+    cols, rows = gviz_query(df, tq)
+    out = io.StringIO()
+    writer = csv.writer(out, quoting=csv.QUOTE_ALL, lineterminator="\n")
+    writer.writerow([col["label"] for col in cols])
+    writer.writerows([("" if c is None else c.get("f", c["v"])) for c in row] for row in rows)
+    return out.getvalue().encode("utf-8")
+
+def gviz_html(df, tq="") -> bytes:
+    rows = [df.columns.tolist()] + df.astype(str).values.tolist()
+    body = "".join("<tr>" + "".join(f"<td>{escape(str(v))}</td>" for v in row) + "</tr>" for row in rows)
+    return f"<html><body><table border=1>{body}</table></body></html>".encode("utf-8")
+
+FORMATS = {
+    "csv": (lambda df, tq: csv_bytes(df), "text/csv; charset=utf-8"),
+    "gviz_csv": (gviz_csv, "text/csv; charset=utf-8"),
+    "gviz_json": (gviz_json, "application/javascript; charset=utf-8"),
+    "gviz_html": (gviz_html, "text/html; charset=utf-8"),
+}
+
+@contextmanager
+def serve(tabs: dict, latency=0.0, loading=None):
+    """
+    Uruchamia serwer w wątku na losowym porcie i zwraca jego adres bazowy.
+    tabs – {gid: DataFrame}; loading – {gid: ile pierwszych odpowiedzi ma zawierać "Ładuję..."}
+    """
+    server = SheetsServer(("127.0.0.1", 0), SheetsHandler)
+    server.tabs = {str(gid): df for gid, df in tabs.items()}
+    server.latency = latency
+    server.loading = {str(gid): n for gid, n in (loading or {}).items()}
+    server.requests = {}
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
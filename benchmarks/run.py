@@ -0,0 +1,201 @@
+"""
+Zestaw benchmarków na syntetycznych arkuszach (benchmarks/synthetic.py) serwowanych
+przez lokalny zamiennik Google Sheets (benchmarks/fake_sheets.py) - bez sieci i bez
+prawdziwego arkusza.
+
+Mierzy u.str2float, scrapery (CSV, CSV z 'Ładuję...', gviz HTML i JSON), u.fetchTabs,
+każdą funkcję z src.plots i pełne run_update(force=True), a wyniki porównuje
+z benchmarks/baselines.json. Przypadek wolniejszy niż baseline * --tolerance
+kończy skrypt kodem 1.
+
+Baseline są zapisane względem pętli kalibracyjnej (calibrate) - czas przypadku
+podzielony przez czas kalibracji na tej samej maszynie - więc szybszy czy wolniejszy
+serwer nie daje od razu fałszywych regresji.
+
+    python -m benchmarks.run                       # porównanie z baseline
+    python -m benchmarks.run --update-baselines    # zapis nowych baseline
+    python -m benchmarks.run --sizes 10 1000 100000 --latency 0.05
+
+Kalibracja nie wyrówna wszystkiego (np. inny dysk, inna wersja pandas) - wtedy trzeba
+baseline odświeżyć (--update-baselines).
+"""
+import os
+import io
+import sys
+import json
+import time
+import atexit
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines.json")
+
+# względne ścieżki z config.py (cache/, log/) lądują w katalogu tymczasowym,
+# więc trzeba się do niego przenieść przed importem modułów z src/
+WORKDIR = tempfile.mkdtemp(prefix="hossa-bench-")
+os.chdir(WORKDIR)
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+
+import config
+config.LOG_STDOUT = False
+config.TAB_CACHE_TTL = {"default": 0}
+
+import src.utils as u
+import src.update_script as us
+from benchmarks import fake_sheets
+from benchmarks.synthetic import make_sheet, csv_bytes
+
+SHEET_ID = "bench"
+GIDS = {name: str(i) for i, name in enumerate(config.GIDS)}
+
+def calibrate(repeat=5) -> float:
+    """
+    Najlepszy czas stałej pętli (czysty Python: parsowanie liczb, słownik, sortowanie,
+    json) - jednostka, w której zapisane są baseline.
+    """
+    text = [f"{i % 997},{i % 89:02d}%" for i in range(200_000)]
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        counts = {}
+        for item in text:
+            whole, frac = item.rstrip("%").split(",")
+            key = float(f"{whole}.{frac}")
+            counts[key] = counts.get(key, 0) + 1
+        json.loads(json.dumps(sorted(counts.items())))
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def best_of(func, repeat, tabs, latency, loading):
+    """
+    Najlepszy czas z `repeat` uruchomień (stdout - "Saved new plot" itp. - wyciszony).
+    Serwer startuje od nowa przed każdym uruchomieniem, żeby każde dostało
+    te same odpowiedzi 'Ładuję...'.
+    """
+    times = []
+    for _ in range(repeat):
+        with fake_sheets.serve(tabs, latency=latency, loading=loading) as base_url:
+            config.SHEETS_BASE_URL = base_url
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - t0)
+    return min(times)
+
+def fetched(name, df) -> bytes:
+    """CSV zakładki w postaci, w jakiej zwraca go us.fetch_tab (z zapytaniem z config.QUERIES)."""
+    query = config.QUERIES.get(name)
+    if query:
+        df = u.applyQuery(u.readCsv(csv_bytes(df), keep_default_na=False), query)
+    return csv_bytes(df)
+
+def cases(rows, sheet, out):
+    """(nazwa przypadku, funkcja) dla jednego rozmiaru arkusza."""
+    gid = GIDS["stopa"]
+    stopa, wig, tab, sums = (us.load_tab(name, fetched(name, sheet[name])) for name in ("stopa", "wig", "tab", "sums"))
+
+    def artifact(title, *frames):
+        # te same parametry co w run_update
+        spec = us.ARTIFACTS[title]
+        return lambda: spec["render"](*frames, title=title, path=out, **spec["params"])
+
+    yield "str2float", lambda: u.str2float(sheet["stopa"]["Stopa zwrotu"])
+    yield "scrape_csv", lambda: u.scrapeDfFromSpreadsheet(SHEET_ID, gid)
+    yield "scrape_csv_fallback", lambda: u.scrapeDfFromSpreadsheetFallback(SHEET_ID, gid, delay=0)
+    yield "scrape_gviz_html", lambda: u.scrapeDataFromSpreadsheetHtml(SHEET_ID, gid)
+    yield "scrape_gviz_json", lambda: u.scrapeDataFromSpreadsheet(SHEET_ID, gid)
+    yield "fetch_tabs", lambda: u.fetchTabs(SHEET_ID, GIDS, fallback=us.FALLBACK_TABS, use_cache=False,
+                                            queries=config.QUERIES)
+    yield "plots.table2html", artifact("portfolio_tab", tab)
+    yield "plots.vals2html", artifact("sums_tab", sums)
+    yield "plots.horizontal_bars", artifact("stopa-zwrotu", stopa)
+    yield "plots.donut", artifact("udzial", stopa)
+    yield "plots.portfolio_vs_wig", artifact("portfolio_vs_wig", wig)
+    yield "run_update", lambda: us.run_update(force=True)
+
+def run(sizes, repeat, latency, loading, max_rows_render):
+    results = {}
+    for rows in sizes:
+        sheet = make_sheet(rows)
+        tabs = {GIDS[name]: df for name, df in sheet.items()}
+        # 'Ładuję...' tylko w przypadku scrape_csv_fallback - w fetch_tabs/run_update
+        # każda taka odpowiedź to sekundy backoffu w fetchCsvFallback, które zasłoniłyby resztę
+        load = {GIDS["stopa"]: loading}
+        for name, func in cases(rows, sheet, out=tempfile.mkdtemp(dir=WORKDIR)):
+            if rows > max_rows_render and (name.startswith("plots.") or name == "run_update"):
+                continue
+            n = repeat if name != "run_update" else 1
+            seconds = best_of(func, n, tabs, latency, load if name == "scrape_csv_fallback" else {})
+            key = f"{name}[{rows}]"
+            results[key] = round(seconds, 6)
+            print(f"{key:<36} {seconds * 1000:10.2f} ms")
+    return results
+
+def compare(results, baselines, tolerance, min_delta, unit):
+    """results w sekundach, baselines w jednostkach kalibracji (`unit` - czas kalibracji w s)."""
+    regressions = []
+    for key, seconds in results.items():
+        base = baselines.get(key)
+        if base is None:
+            continue
+        base *= unit
+        ratio = seconds / base if base else float("inf")
+        # przy przypadkach rzędu milisekund sam szum przekracza tolerancję - stąd próg bezwzględny
+        if ratio > tolerance and seconds - base > min_delta:
+            regressions.append(f"{key}: {seconds * 1000:.2f} ms vs baseline {base * 1000:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000],
+                        help="liczba wierszy syntetycznych zakładek")
+    parser.add_argument("--repeat", type=int, default=3, help="powtórzenia (liczy się najlepszy czas)")
+    parser.add_argument("--latency", type=float, default=0.0, help="opóźnienie odpowiedzi serwera [s]")
+    parser.add_argument("--loading", type=int, default=2,
+                        help="ile pierwszych odpowiedzi w scrape_csv_fallback zawiera 'Ładuję...'")
+    parser.add_argument("--max-rows-render", type=int, default=10000,
+                        help="powyżej tylu wierszy pomijane są wykresy i run_update")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="dopuszczalne spowolnienie względem baseline")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="spowolnienia mniejsze niż tyle sekund nie są regresją")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["sheetId"] = SHEET_ID
+    us.gids = GIDS
+    us.output_path = os.path.join(WORKDIR, "plots")
+    config.SNAPSHOTS = False
+    us.tc.evict(0)
+
+    unit = calibrate()
+    print(f"{'calibration':<36} {unit * 1000:10.2f} ms")
+    results = run(args.sizes, args.repeat, args.latency, args.loading, args.max_rows_render)
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baselines:
+        baselines.update({key: round(seconds / unit, 4) for key, seconds in results.items()})
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baselines.items())), f, indent=2)
+            f.write("\n")
+        print(f"Baselines saved: {BASELINES}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance, args.min_delta, unit)
+    if regressions:
+        print(f"\nREGRESSION (> {args.tolerance}x baseline):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nOK - no case slower than {args.tolerance}x baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
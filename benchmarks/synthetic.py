@@ -0,0 +1,76 @@
+"""
+Syntetyczne zakładki o kształcie arkusza portfela (tab, stopa, sums, wyceny, wig):
+polskie przecinki dziesiętne, wartości procentowe jako tekst, puste komórki i "-".
+"""
+import numpy as np
+import pandas as pd
+
+def pl_number(values, decimals=2, suffix=""):
+    return [f"{v:.{decimals}f}".replace(".", ",") + suffix for v in values]
+
+def with_blanks(values, rng, share=0.03, blank="-"):
+    values = list(values)
+    for i in np.flatnonzero(rng.random(len(values)) < share):
+        values[i] = blank
+    return values
+
+def make_tab(name, rows, seed=0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    names = [f"Spółka {i}" for i in range(rows)]
+
+    if name == "tab":
+        buy = rng.uniform(5, 400, rows)
+        now = buy * rng.normal(1.05, 0.2, rows)
+        qty = rng.integers(1, 500, rows)
+        return pd.DataFrame({
+            "Nazwa": names,
+            "Ticker": [f"SP{i:05d}" for i in range(rows)],
+            "Ilość": qty,
+            "Kurs zakupu": pl_number(buy),
+            "Kurs aktualny": pl_number(now),
+            "Wartość": pl_number(now * qty, suffix=" zł"),
+            "Stopa zwrotu": pl_number((now / buy - 1) * 100, suffix="%"),
+        })
+    if name == "stopa":
+        return pd.DataFrame({
+            "Nazwa": names,
+            "Stopa zwrotu": with_blanks(pl_number(rng.normal(4, 25, rows), suffix="%"), rng),
+            "Udział w portfelu": pl_number(rng.dirichlet(np.ones(rows)) * 100, suffix="%"),
+        })
+    if name == "sums":
+        # pierwsza i ostatnia kolumna są odcinane w run_update (.iloc[:,1:-1])
+        return pd.DataFrame({
+            "": [""] * rows,
+            "Wartość portfela": pl_number(rng.uniform(1e4, 1e6, rows), suffix=" zł"),
+            "Wpłaty": pl_number(rng.uniform(1e4, 1e6, rows), suffix=" zł"),
+            "Zysk": pl_number(rng.normal(1e4, 5e4, rows), suffix=" zł"),
+            "Stopa zwrotu": pl_number(rng.normal(8, 15, rows), suffix="%"),
+            "Uwagi": [""] * rows,
+        })
+    if name == "wyceny":
+        return pd.DataFrame({
+            "Nazwa": names,
+            "Kurs": pl_number(rng.uniform(5, 400, rows)),
+            "DCF": with_blanks(pl_number(rng.uniform(5, 400, rows)), rng, share=0.2, blank=""),
+            "Potencjał": pl_number(rng.normal(10, 30, rows), suffix="%"),
+            "Raport": names,
+            "link (hidden)": [f"https://example.com/wyceny/{i}?v=1&src=sheet" for i in range(rows)],
+        })
+    if name == "wig":
+        # dziennie, a przy dużych rozmiarach gęściej (100k dni nie mieści się w zakresie pandas)
+        freq = "D" if rows <= 50000 else "h"
+        dates = pd.date_range("2000-01-03", periods=rows, freq=freq).strftime("%Y-%m-%d %H:%M")
+        return pd.DataFrame({
+            "Data": dates,
+            "Stopa zwrotu portfela": with_blanks(pl_number(np.cumsum(rng.normal(0.03, 1, rows))), rng, 0.01),
+            "WIG": with_blanks(pl_number(np.cumsum(rng.normal(0.02, 1, rows))), rng, 0.01),
+        })
+    raise ValueError(f"unknown tab: {name}")
+
+def make_sheet(rows, seed=0) -> dict:
+    """{nazwa zakładki: DataFrame} - `rows` wierszy w każdej zakładce poza sums (2 wiersze)."""
+    return {name: make_tab(name, 2 if name == "sums" else rows, seed)
+            for name in ("tab", "stopa", "sums", "wyceny", "wig")}
+
+def csv_bytes(df) -> bytes:
+    return df.to_csv(index=False).encode("utf-8")
@@ -8,12 +8,147 @@ GIDS = {
     "wig": '1164349481'
 }
 
+# tryb wielu portfeli (src/batch.py: python -m src.batch) - nazwa portfela -> {
+#   "sheetId": id arkusza albo "sheetId_env": nazwa zmiennej środowiskowej z id,
+#   "folder": folder jak WP_FOLDER (wykresy w <folder>/PLOTS_FOLDER, snapshoty w <folder>/BACKUP_FOLDER),
+#   "gids": zakładki (domyślnie GIDS; artefakty, których zakładek nie ma, są pomijane)}
+# Wszystkie portfele idą jednym grafem na wspólnych pulach (BATCH_FETCH_WORKERS pobrań, RENDER_WORKERS
+# renderowań naraz), sesji HTTP i cache. Błąd jednego portfela nie zatrzymuje pozostałych.
+# Pusty słownik = jeden portfel jak dotąd (sheetId ze zmiennej środowiskowej, WP_FOLDER, python src/update_script.py)
+PORTFOLIOS = {}
+BATCH_FETCH_WORKERS = 16
+
+# artefakt -> zakładki, z których powstaje (funkcje renderujące i parametry: ARTIFACTS w src/update_script.py).
+# Tutaj, żeby Flask (/update/<cele>, src/targets.py) sprawdzał nazwy bez importu pandas/plotly
+ARTIFACT_TABS = {
+    "stopa-zwrotu": ("stopa",),
+    "udzial": ("stopa",),
+    "portfolio_vs_wig": ("wig",),
+    "portfolio_tab": ("tab",),
+    "wyceny_tab": ("wyceny",),
+    "sums_tab": ("sums",),
+}
+
+# typy kolumn zakładek (z GIDS), nadawane raz przy wczytaniu CSV (u.readCsv):
+#   "numeric" / "percent" – liczba z przecinkiem dziesiętnym ("12,5", "-3,1%"); "", "-" -> NaN.
+#                           "percent" zostaje w punktach procentowych (12,5% -> 12.5)
+#   "date" – datetime64, "category" – powtarzające się etykiety, "link" – URL (tekst bez spacji)
+#   "*" – typ pozostałych kolumn; kolumny bez typu zostają tekstem (tak jak je pokazuje arkusz)
+# zakładki renderowane jako tabele (tab, sums, wyceny) zostają tekstem, żeby HTML pokazywał wartości 1:1
+SCHEMAS = {
+    "stopa": {"Nazwa": "category", "Stopa zwrotu": "percent", "Udział w portfelu": "percent"},
+    "wyceny": {"link (hidden)": "link"},
+    "wig": {"Data": "date", "*": "percent"},
+}
+
+# kolumny i wiersze zakładek, które są potrzebne do renderowania (reszta nie jest pobierana):
+#   "select": [nagłówki] albo "columns": [od, do] (pozycje kolumn jak w iloc, None = do końca)
+#   "not_empty": [nagłówki] – tylko wiersze z niepustą wartością w tych kolumnach
+# Zapytanie idzie do Google (gviz tq=: select ... where ...) tylko dla zakładek z QUERY_PUSHDOWN_TABS,
+# a gdy się nie uda, cała zakładka jest pobierana i filtrowana lokalnie tak samo (QUERY_PUSHDOWN = False:
+# zawsze lokalnie). gviz zwraca puste komórki, których typ różni się od większości kolumny (np. "brak"
+# czy "-" w kolumnie liczb, 'Ładuję...'), więc pushdown jest tylko dla zakładek z samymi wykresami;
+# tabele (wartości 1:1), filtry "not_empty" i zakładki z 'Ładuję...' (FALLBACK_TABS) zawsze lokalnie.
+QUERY_PUSHDOWN = True
+QUERY_PUSHDOWN_TABS = ("stopa", "wig")
+QUERIES = {
+    "stopa": {"select": ["Nazwa", "Stopa zwrotu", "Udział w portfelu"]},
+    "sums": {"columns": [1, -1]},
+    "wyceny": {"not_empty": ["DCF"]},
+}
+
+# adres Google Sheets (benchmarki podmieniają go na lokalny serwer, patrz benchmarks/fake_sheets.py)
+SHEETS_BASE_URL = "https://docs.google.com"
+
+# pobieranie zakładek: ile równoległych połączeń i timeout (s) pojedynczego zapytania
+FETCH_WORKERS = 5
+FETCH_TIMEOUT = 30
+
+# zakładki z 'Ładuję...' (FALLBACK_TABS w update_script): maks. liczba prób, opóźnienie przed
+# kolejną próbą rośnie wykładniczo od LOADING_DELAY do LOADING_MAX_DELAY (s, z losowym jitterem),
+# a wszystkie próby razem mieszczą się w LOADING_DEADLINE (s). Potem używana jest ostatnia dobra kopia z cache.
+LOADING_RETRIES = 5
+LOADING_DELAY = 1
+LOADING_MAX_DELAY = 8
+LOADING_DEADLINE = 30
+
+# renderowanie artefaktów: liczba workerów i rodzaj puli ("thread" albo "process")
+RENDER_WORKERS = 4
+RENDER_EXECUTOR = "thread"
+
 PLOTS_FOLDER = "plots"
 LOG_FILE = "log/log.txt"
-BACKUP_FOLDER = "backup"
+
+# logowanie: poziom, rotacja "size" (LOG_MAX_BYTES) albo "time" (LOG_ROTATE_WHEN), stare segmenty jako .gz
+LOG_LEVEL = "INFO"
+LOG_ROTATE = "size"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_ROTATE_WHEN = "midnight"
+LOG_BACKUP_COUNT = 10
+LOG_STDOUT = True
+
+METRICS_FILE = "log/metrics.json"       # metryki ostatniego uruchomienia (dla /metrics)
+METRICS_HISTORY = "log/metrics.jsonl"   # jedna linia JSON na uruchomienie
+BACKUP_FOLDER = "backup"                # w WP_FOLDER: historia opublikowanych plików (src/snapshots.py)
+CACHE_FOLDER = "cache"
+MANIFEST_FILE = "cache/manifest.json"
+
+# snapshot folderu wykresów po każdym uruchomieniu: treść każdego pliku jest zapisana raz (hardlink),
+# a snapshot to manifest nazwa -> hash. Zostaje SNAPSHOT_KEEP ostatnich i wszystkie młodsze niż SNAPSHOT_MAX_AGE (s)
+SNAPSHOTS = True
+SNAPSHOT_KEEP = 100
+SNAPSHOT_MAX_AGE = 30 * 24 * 3600
+
+# zakładki z szeregiem czasowym trzymane lokalnie w SQLite (src/history.py): nazwa zakładki -> kolumna dat.
+# Co uruchomienie pobierany jest tylko ogon od ostatniej zapisanej daty (gviz tq= where <data> >= ...),
+# a cała zakładka co HISTORY_FULL_SYNC s (sprawdzenie poprawek wstecz), przy --force albo gdy ogon
+# nie pasuje do historii. Aktualizacja idzie mniej więcej codziennie, więc interwał musi być dużo dłuższy
+# od doby - inaczej prawie każde uruchomienie pobierałoby całą zakładkę.
+# Kolumna dat musi mieć w arkuszu typ daty - inaczej ogon jest wycinany lokalnie z całej zakładki.
+HISTORY_DB = "cache/history.sqlite"
+HISTORY_TABS = {"wig": "Data"}
+HISTORY_FULL_SYNC = 14 * 24 * 3600
+
+# cache surowych CSV zakładek: TTL (s) per zakładka i jak długo trzymać kopie na fallback
+TAB_CACHE_TTL = {
+    "default": 300,
+    "sums": 60
+}
+TAB_CACHE_RETENTION = 7 * 24 * 3600
+
+# zadania aktualizacji uruchamiane przez Flask w tle (statusy + blokada między procesami)
+JOBS_FOLDER = "cache/jobs"
+JOBS_KEEP = 50
+
+# maks. liczba punktów na serię w portfolio_vs_wig (LTTB), None = bez zmniejszania
+WIG_MAX_POINTS = 1000
+# portfolio_vs_wig przyrostowo: strona ładuje punkty z paczek obok (<nazwa>.rows-*.json, raz zapisane
+# się nie zmieniają) i małego <nazwa>.tail.json z ostatnimi dniami - dzienna aktualizacja zapisuje kilkaset bajtów.
+# Paczki mają SERIES_CHUNK_ROWS * SERIES_CHUNK_FANOUT^k wierszy (co FANOUT mniejszych łączy się w jedną większą).
+# WIG_MAX_POINTS działa tu na każdą paczkę osobno (najwyżej WIG_MAX_POINTS // SERIES_CHUNK_FANOUT punktów,
+# ostatnie dni pełne), więc liczba punktów rośnie o ~WIG_MAX_POINTS na każde FANOUT-krotne wydłużenie
+# historii zamiast być stała jak bez paczek (przy 1000 i 8: najwyżej ~1400 punktów do 4096 dni notowań,
+# ~2300 do 32768). Kompromis: stałe paczki (tania dzienna aktualizacja) za trochę więcej punktów.
+WIG_INCREMENTAL = True
+SERIES_CHUNK_ROWS = 8
+SERIES_CHUNK_FANOUT = 8
+
+# skąd wykresy ładują plotly.js: "cdn" (cdn.plot.ly) albo "self" (plotly-<hash>.min.js w folderze z wykresami)
+PLOTLYJS = "self"
+
+# format wykresów: "html" (samodzielne strony), "json" (<nazwa>.json + chart.html?src=<nazwa>) albo "both"
+CHART_OUTPUT = "html"
+CHART_DECIMALS = 3
+
+# pliki wynikowe: minifikacja HTML/CSS i skompresowane kopie obok (<plik>.gz, <plik>.br), które serwer
+# wysyła bez kompresji przy każdym żądaniu (nginx gzip_static/brotli_static, reguły w .htaccess - patrz README).
+# "br" wymaga pakietu brotli (bez niego powstaje tylko .gz); pliki mniejsze niż OUTPUT_COMPRESS_MIN_BYTES bez kopii
+OUTPUT_MINIFY = True
+OUTPUT_PRECOMPRESS = ("gz", "br")
+OUTPUT_COMPRESS_MIN_BYTES = 512
 
 HOSSA_COL = {
     "dark_green" : "#304536",
     "light_green" : '#5D6C61',
     "dark_red" : '#852029'
-}
\ No newline at end of file
+}
@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import argparse
+import traceback
+
+import config
+import src.update_script as us
+import src.manifest as mf
+import src.publish as pub
+import src.metrics as metrics
+import src.targets as tg
+from src.log_utils import log
+
+PORTFOLIO_NAME = re.compile(r"^[\w-]+$")
+
+def resolve(name, spec) -> dict:
+    """
+    Portfel z config.PORTFOLIOS -> {"sheetId", "gids", "output" (folder wykresów),
+    "snapshots" (folder historii)}. Brak id arkusza albo folderu to ValueError.
+    """
+    if not PORTFOLIO_NAME.match(name):
+        raise ValueError(f"Portfolio name {name!r}: only letters, digits, '_' and '-'")
+    sheetId = spec.get("sheetId") or os.environ.get(spec.get("sheetId_env", ""))
+    if not sheetId:
+        raise ValueError(f"Portfolio {name}: sheetId not set (sheetId / sheetId_env)")
+    if not spec.get("folder"):
+        raise ValueError(f"Portfolio {name}: folder not set")
+    return {
+        "sheetId": sheetId,
+        "gids": spec.get("gids") or config.GIDS,
+        "output": os.path.join(spec["folder"], config.PLOTS_FOLDER),
+        "snapshots": os.path.join(spec["folder"], config.BACKUP_FOLDER),
+    }
+
+def _failed(error) -> dict:
+    return {"rebuilt": [], "unchanged": [], "failed": [], "error": error}
+
+def run_batch(force=False, on_stage=None, names=None, portfolios=None, targets=None):
+    """
+    run_update dla wielu portfeli w jednym procesie: grafy wszystkich portfeli (węzły
+    "<portfel>/fetch:<zakładka>", "<portfel>/<artefakt>") są łączone w jeden i wykonywane
+    na wspólnych pulach - najwyżej config.BATCH_FETCH_WORKERS pobrań i config.RENDER_WORKERS
+    renderowań naraz, niezależnie od liczby portfeli. Sesja HTTP, cache zakładek,
+    historia i manifest są wspólne.
+    
+    Każdy portfel ma własny folder wykresów i snapshotów. Błąd portfela (konfiguracja,
+    pobranie, render, publikacja) trafia do jego podsumowania - pozostałe są publikowane.
+    
+    names – tylko te portfele (domyślnie wszystkie)
+    portfolios – zamiast config.PORTFOLIOS
+    targets – tylko te artefakty / zakładki w każdym portfelu (jak w run_update)
+    on_stage – jak w run_update ("build", "publish", "snapshot")
+    
+    Zwraca {"portfolios": {nazwa: podsumowanie jak z run_update}, "rebuilt": [...],
+    "unchanged": [...], "failed": [...] (jako "<portfel>/<artefakt>"), "error": None | str}.
+    """
+    def stage(name):
+        metrics.mark_stage(name)
+        if on_stage is not None:
+            on_stage(name)
+
+    portfolios = tg.select_portfolios(names, portfolios)
+    tg.portfolio_plan(targets, portfolios=portfolios)  # nieznane nazwy - ValueError, zanim cokolwiek ruszy
+
+    scope = "" if targets is None else f": {', '.join(targets)}"
+    log(f"=== Starting batch update ({len(portfolios)} portfolios){scope} ===")
+    metrics.start_run()
+    summaries, resolved = {}, {}
+    error = None
+
+    try:
+        stage("build")
+        manifest = mf.load_manifest()
+        nodes = {}
+        for name, spec in portfolios.items():
+            try:
+                target = resolve(name, spec)
+                os.makedirs(target["output"], exist_ok=True)
+                target["staging"] = pub.staging_dir(target["output"])
+            except Exception as e:
+                log(f"ERROR in portfolio {name}: {type(e).__name__}: {e}", "error")
+                summaries[name] = _failed(f"{type(e).__name__}: {e}")
+                continue
+            resolved[name] = target
+            nodes.update(us.build_graph(target["sheetId"], target["staging"], manifest, force,
+                                        tabs=target["gids"], output=target["output"], prefix=f"{name}/",
+                                        targets=tg.for_tabs(targets, target["gids"])))
+
+        results, errors = us.run_graph(nodes, [target["staging"] for target in resolved.values()],
+                                       fetch_workers=config.BATCH_FETCH_WORKERS)
+
+        stage("publish")
+        published = []
+        for name, target in resolved.items():
+            try:
+                summaries[name] = us.publish_results(results, errors, target["staging"], manifest,
+                                                     target["output"], prefix=f"{name}/")
+                published.append(name)
+            except Exception as e:
+                pub.discard(target["staging"])
+                log(f"ERROR in portfolio {name}: {type(e).__name__}: {e}", "error")
+                log(traceback.format_exc(), "error")
+                summaries[name] = _failed(f"{type(e).__name__}: {e}")
+
+        if config.SNAPSHOTS:
+            stage("snapshot")
+            for name in published:
+                target = resolved[name]
+                summaries[name]["snapshot"] = us.take_snapshot(target["output"], target["snapshots"])
+
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        log("ERROR occurred during batch update!", "error")
+        log(traceback.format_exc(), "error")
+
+    summary = {
+        "portfolios": summaries,
+        **{outcome: [f"{name}/{title}" for name, s in summaries.items() for title in s[outcome]]
+           for outcome in ("rebuilt", "unchanged", "failed")},
+        "error": error or "; ".join(f"{name}: {s['error']}" for name, s in summaries.items() if s["error"]) or None,
+    }
+    metrics.finish_run(**summary)
+    log(f"=== Batch update completed: {len(summaries) - sum(bool(s['error']) for s in summaries.values())}"
+        f"/{len(portfolios)} portfolios OK ===")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aktualizacja wielu portfeli (config.PORTFOLIOS) w jednym procesie.")
+    parser.add_argument("portfolios", nargs="*", help="nazwy portfeli (domyślnie wszystkie)")
+    parser.add_argument("-t", "--target", action="append", dest="targets",
+                        help="tylko ten artefakt albo zakładka (można powtarzać; domyślnie wszystko)")
+    parser.add_argument("--force", action="store_true", help="przebuduj wybrane artefakty, nawet gdy wejścia się nie zmieniły")
+    parser.add_argument("--dry-run", action="store_true", help="tylko wypisz plan każdego portfela")
+    args = parser.parse_args(argv)
+    if not config.PORTFOLIOS:
+        print("config.PORTFOLIOS is empty - use python -m src.update_script for a single portfolio")
+        return 1
+    try:
+        plans = tg.portfolio_plan(args.targets, args.portfolios)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dry_run:
+        for name, p in plans.items():
+            print(f"[{name}]")
+            print(us.describe_plan(p, args.force))
+        return 0
+    summary = run_batch(force=args.force, names=args.portfolios, targets=args.targets)
+    return 1 if summary["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,85 @@
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-
 import pandas as pd
 import numpy as np
 
-import colorsys
+from functools import lru_cache
 
 import src.utils as u
 
+ONE_THIRD = 1.0/3.0
+ONE_SIXTH = 1.0/6.0
+TWO_THIRD = 2.0/3.0
+
+# Konwersje (tablice numpy, kolory jako wiersze)
+@lru_cache(maxsize=256)
+def hex2rgb255(color):
+    """'#rrggbb' / '#rgb' / nazwa z NAMED_COLORS -> (r, g, b) w skali 0–255 (z cache)."""
+    color = NAMED_COLORS.get(color.lower(), color).lstrip('#')
+    if len(color) == 3:
+        color = "".join(ch * 2 for ch in color)
+    return tuple(int(color[i:i+2], 16) for i in (0, 2, 4))
+
+def hex_list(rgb255):
+    """Tablica (n, 3) liczb 0–255 -> lista '#rrggbb' (jedno kodowanie całej tablicy)."""
+    h = np.ascontiguousarray(rgb255, dtype=np.uint8).tobytes().hex()
+    return ["#" + h[i:i+6] for i in range(0, len(h), 6)]
+
+def rgb_to_hls(rgb):
+    """Wektorowa wersja colorsys.rgb_to_hls dla tablicy (n, 3) w skali 0–1."""
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = rgb.max(axis=1)
+    minc = rgb.min(axis=1)
+    sumc = maxc + minc
+    rangec = maxc - minc
+    l = sumc / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(l <= 0.5, rangec / sumc, rangec / (2.0 - maxc - minc))
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+        h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+        h = (h / 6.0) % 1.0
+    gray = minc == maxc
+    h[gray] = 0.0
+    s[gray] = 0.0
+    return h, l, s
+
+def _v(m1, m2, hue):
+    hue = hue % 1.0
+    return np.select(
+        [hue < ONE_SIXTH, hue < 0.5, hue < TWO_THIRD],
+        [m1 + (m2 - m1) * hue * 6.0, m2, m1 + (m2 - m1) * (TWO_THIRD - hue) * 6.0],
+        default=m1,
+    )
+
+def hls_to_rgb(h, l, s):
+    """Wektorowa wersja colorsys.hls_to_rgb -> tablica (n, 3) w skali 0–1."""
+    m2 = np.where(l <= 0.5, l * (1.0 + s), l + s - (l * s))
+    m1 = 2.0 * l - m2
+    rgb = np.stack([_v(m1, m2, h + ONE_THIRD), _v(m1, m2, h), _v(m1, m2, h - ONE_THIRD)], axis=1)
+    gray = s == 0.0
+    rgb[gray] = l[gray, None]
+    return rgb
+
+def lighten(rgb255, amount=0.4):
+    """Rozjaśnia tablicę kolorów (n, 3) 0–255, ale nie do czystej bieli."""
+    h, l, s = rgb_to_hls(np.asarray(rgb255, dtype=float) / 255)
+    l = np.minimum(1, l + amount * (1 - l))  # rozjaśnianie bez wybielania
+    return (hls_to_rgb(h, l, s) * 255).astype(int)
+
+def interpolate(rgb1, rgb2, t):
+    """Interpolacja liniowa dla tablicy `t`: wiersz (r, g, b) 0–255 na każdą wartość t."""
+    rgb1 = np.asarray(rgb1, dtype=float)
+    rgb2 = np.asarray(rgb2, dtype=float)
+    t = np.asarray(t, dtype=float)[:, None]
+    return (rgb1 + (rgb2 - rgb1) * t).astype(int)
+
+@lru_cache(maxsize=256)
 def lighten_color(hex_color, amount=0.4):
     """
     Rozjaśnia kolor hex o podany współczynnik (0–1),
     ale nie do czystej bieli.
     """
-    hex_color = hex_color.lstrip('#')
-    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    h, l, s = colorsys.rgb_to_hls(r/255, g/255, b/255)
-    l = min(1, l + amount * (1 - l))  # rozjaśnianie bez wybielania
-    r, g, b = colorsys.hls_to_rgb(h, l, s)
-    return '#{:02x}{:02x}{:02x}'.format(int(r*255), int(g*255), int(b*255))
+    return hex_list(lighten([hex2rgb255(hex_color)], amount))[0]
 
 
 def interpolate_color(c1, c2, t):
@@ -27,39 +88,99 @@ def interpolate_color(c1, c2, t):
     t = 0 → c1
     t = 1 → c2
     """
-    c1 = c1.lstrip('#')
-    c2 = c2.lstrip('#')
-    r1, g1, b1 = tuple(int(c1[i:i+2], 16) for i in (0, 2, 4))
-    r2, g2, b2 = tuple(int(c2[i:i+2], 16) for i in (0, 2, 4))
-
-    r = int(r1 + (r2 - r1) * t)
-    g = int(g1 + (g2 - g1) * t)
-    b = int(b1 + (b2 - b1) * t)
-
-    return f'#{r:02x}{g:02x}{b:02x}'
+    return hex_list(interpolate(hex2rgb255(c1), hex2rgb255(c2), [t]))[0]
 
 def positive_negative_colors(colors, values):
+    """
+    Kolory słupków: ujemne od jasnego do pełnego `neg_color` (im mniejsza wartość,
+    tym ciemniej), dodatnie od jasnego do pełnego `pos_color`. Liczone na całej tablicy naraz.
+    """
     neg_color, pos_color = colors
-    min_val = min(values)
-    max_val = max(values)
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return []
+    min_val = np.nanmin(values)
+    max_val = np.nanmax(values)
 
     neg_light = lighten_color(neg_color, 0.5)
     pos_light = lighten_color(pos_color, 0.5)
 
-    new_colors = []
-    for v in values:
-        if v < 0:
-            if min_val != 0:
-                t = v / min_val  
-            else:
-                t = 1
-            new_colors.append(interpolate_color(neg_light, neg_color, t))
-        else:
-            t = v / max_val if max_val != 0 else 1
-            t = 1 - t
-            new_colors.append(interpolate_color(pos_color, pos_light, t))
-    return new_colors
-
+    neg = values < 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_neg = values / min_val if min_val != 0 else np.ones_like(values)
+        t_pos = 1 - (values / max_val if max_val != 0 else np.ones_like(values))
+    t_neg = np.nan_to_num(t_neg)
+    t_pos = np.nan_to_num(t_pos)
+
+    rgb = np.where(
+        neg[:, None],
+        interpolate(hex2rgb255(neg_light), hex2rgb255(neg_color), t_neg),
+        interpolate(hex2rgb255(pos_color), hex2rgb255(pos_light), t_pos),
+    )
+    return hex_list(rgb)
+
+
+# Colormap bez matplotlib (ta sama tablica 256 kolorów co LinearSegmentedColormap.from_list)
+NAMED_COLORS = {
+    "white": "#ffffff",
+    "black": "#000000",
+    "gray": "#808080",
+    "grey": "#808080",
+    "red": "#ff0000",
+    "green": "#008000",
+    "blue": "#0000ff",
+}
+
+def hex2rgb(color):
+    """'#rrggbb' / '#rgb' / nazwa z NAMED_COLORS -> (r, g, b) w skali 0–1."""
+    return tuple(v / 255 for v in hex2rgb255(color))
+
+def rgb2hex(color):
+    """Kolor (hex/nazwa albo krotka RGB(A) 0–1) -> '#rrggbb'."""
+    if isinstance(color, str):
+        color = hex2rgb(color)
+    return "#" + "".join(format(round(v * 255), "02x") for v in color[:3])
+
+def colormap_lut(colors_list, N=256):
+    """
+    Tablica (N, 3) kolorów rozłożonych liniowo między kolorami z `colors_list`.
+    Wynik jest cache'owany per lista kolorów (tablica tylko do odczytu).
+    """
+    return _colormap_lut(tuple(colors_list), N)
+
+@lru_cache(maxsize=64)
+def _colormap_lut(colors_list, N):
+    stops = np.array([hex2rgb(col) for col in colors_list])
+    x = np.linspace(0, 1, len(stops))
+    xind = np.linspace(0, 1, N)
+    ind = np.searchsorted(x, xind)[1:-1]
+    distance = ((xind[1:-1] - x[ind - 1]) / (x[ind] - x[ind - 1]))[:, None]
+    lut = np.concatenate([stops[:1], distance * (stops[ind] - stops[ind - 1]) + stops[ind - 1], stops[-1:]])
+    lut = np.clip(lut, 0.0, 1.0)
+    lut.setflags(write=False)
+    return lut
+
+def apply_colormap(lut, x):
+    """
+    Wartości znormalizowane do 0–1 -> kolory RGBA (n, 4).
+    <0 i >1 dostają skrajne kolory, NaN -> (0, 0, 0, 0).
+    """
+    N = len(lut)
+    xa = np.array(x, dtype=float) * N
+    xa[xa == N] = N - 1
+    bad = np.isnan(xa)
+    idx = np.zeros(len(xa), dtype=int)
+    idx[~bad] = np.clip(xa[~bad], 0, N - 1).astype(int)
+    rgba = np.ones((len(xa), 4))
+    rgba[:, :3] = lut[idx]
+    rgba[bad] = 0.0
+    return rgba
+
+def normalize(values, vmin, vmax):
+    values = np.asarray(values, dtype=float)
+    if vmin == vmax:
+        return np.zeros_like(values)
+    return (values - vmin) / (vmax - vmin)
 
 def generate_colors(df: pd.DataFrame, col_name: str, colors_list=['#a6a6a6', '#304536'], to_hex = True):
     """
@@ -68,35 +189,42 @@ def generate_colors(df: pd.DataFrame, col_name: str, colors_list=['#a6a6a6', '#3
     Args:
         df (pd.DataFrame): DataFrame wejściowy
         col_name (str): nazwa kolumny numerycznej
-        colors_list (list): lista kolorów w hex lub nazwach, np. ["#a6a6a6", "#ffff00", "#2d4236"]
+        colors_list (list): lista kolorów w hex (lub nazw z NAMED_COLORS), np. ["#a6a6a6", "#ffff00", "#2d4236"]
                             jeśli None -> używa ["#a6a6a6", "#2d4236"]
+        to_hex (bool): True -> lista '#rrggbb', False -> tablica RGBA (n, 4)
     
     Returns:
         colors (list): lista kolorów dla wartości
-        cmap (Colormap): obiekt colormap (można wykorzystać do legendy)
-        norm (Normalize): normalizator wartości (np. do colorbar)
+        cmap (callable): wartości 0–1 -> RGBA (np. do legendy)
+        norm (callable): normalizator wartości do 0–1 (np. do colorbar)
     """
-    df[col_name] = u.str2float(df[col_name])
+    values = u.str2float(df[col_name])
   
     # Tworzymy colormap z listy kolorów
-    cmap = mcolors.LinearSegmentedColormap.from_list("custom", colors_list)
+    lut = colormap_lut(colors_list or ['#a6a6a6', '#2d4236'])
+    cmap = lambda x: apply_colormap(lut, x)
     
     # Normalizacja wartości
-    norm = plt.Normalize(df[col_name].min(), df[col_name].max())
+    vmin, vmax = values.min(), values.max()
+    norm = lambda values: normalize(values, vmin, vmax)
     
     # Generujemy kolory dla każdej wartości
-    colors = cmap(norm(df[col_name]))
+    colors = cmap(norm(values))
 
     if to_hex:
-        colors = [mcolors.to_hex(c) for c in colors]
+        colors = hex_list(np.round(colors[:, :3] * 255))
     
     return colors, cmap, norm
 
 def test_colors(df, val, colors_list):
+    # matplotlib tylko do podglądu w notebooku
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+
     colors, cmap, norm = generate_colors(df, val, colors_list=colors_list)
 
     gradient = np.linspace(df[val].min(), df[val].max(), 256).reshape(1, -1)
     plt.figure(figsize=(15,1))
-    plt.imshow(gradient, aspect='auto', cmap=cmap)
+    plt.imshow(gradient, aspect='auto', cmap=ListedColormap(colormap_lut(colors_list)))
     plt.axis('off')
-    plt.show()
\ No newline at end of file
+    plt.show()
@@ -0,0 +1,188 @@
+import io
+import os
+import csv
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import pandas as pd
+
+import config
+import src.utils as u
+import src.metrics as metrics
+from src.log_utils import log
+
+db_path = config.HISTORY_DB
+
+# Lokalna historia zakładek z szeregiem czasowym (config.HISTORY_TABS, np. wig).
+# Wiersz = data (klucz ISO, więc sortuje się chronologicznie) + pola dokładnie tak, jak w CSV
+# z arkusza, dlatego z historii odtwarzany jest ten sam CSV, który dalej idzie do load_tab.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    tab TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    PRIMARY KEY (tab, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tabs (
+    tab TEXT PRIMARY KEY,
+    header TEXT NOT NULL,
+    synced REAL NOT NULL
+);
+"""
+
+# jedna blokada na zakładkę w historii - różne portfele (src.batch) pobierają ogony równolegle
+_locks = {}
+_locks_lock = threading.Lock()
+
+def _lock(key) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def connect(path=None) -> sqlite3.Connection:
+    path = path or db_path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+def parse_rows(data: bytes, date_col) -> tuple[list, list]:
+    """
+    CSV zakładki -> (nagłówek, [(klucz daty ISO, pola), ...]) w kolejności dat.
+    Wiersze bez daty są pomijane (nie ma ich na wykresie), z powtórzonych dat zostaje ostatni.
+    """
+    reader = csv.reader(io.StringIO(data.decode("utf-8")))
+    header = next(reader, [])
+    if date_col not in header:
+        raise ValueError(f"no date column {date_col!r} in {header}")
+    records = [row for row in reader if row]
+    i = header.index(date_col)
+    dates = pd.to_datetime(pd.Series([row[i] if i < len(row) else "" for row in records], dtype=object),
+                           errors="coerce")
+    rows = {}
+    for ts, row in zip(dates, records):
+        if ts is not pd.NaT:
+            rows[ts.isoformat()] = row
+    return header, sorted(rows.items())
+
+def checksum(rows) -> str:
+    h = hashlib.sha256()
+    for key, fields in rows:
+        h.update(key.encode())
+        h.update(json.dumps(fields, ensure_ascii=False).encode())
+    return h.hexdigest()
+
+def to_csv(header, rows) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(fields for _, fields in rows)
+    return out.getvalue().encode("utf-8")
+
+def load(conn, name) -> tuple[list, list] | None:
+    """(nagłówek, wiersze) zakładki z historii albo None, jeśli jej tam nie ma."""
+    state = conn.execute("SELECT header FROM tabs WHERE tab = ?", (name,)).fetchone()
+    if state is None:
+        return None
+    rows = conn.execute("SELECT key, fields FROM rows WHERE tab = ? ORDER BY key", (name,)).fetchall()
+    return json.loads(state[0]), [(key, json.loads(fields)) for key, fields in rows]
+
+def replace(conn, name, header, rows):
+    """Pełna synchronizacja: cała historia zakładki zastąpiona wierszami z arkusza."""
+    with conn:
+        conn.execute("DELETE FROM rows WHERE tab = ?", (name,))
+        conn.executemany("INSERT INTO rows (tab, key, fields) VALUES (?, ?, ?)",
+                         [(name, key, json.dumps(fields, ensure_ascii=False)) for key, fields in rows])
+        conn.execute("INSERT OR REPLACE INTO tabs (tab, header, synced) VALUES (?, ?, ?)",
+                     (name, json.dumps(header, ensure_ascii=False), time.time()))
+
+def append(conn, name, rows):
+    """Dopisuje (albo nadpisuje - ostatni dzień zmienia się w ciągu dnia) wiersze ogona."""
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO rows (tab, key, fields) VALUES (?, ?, ?)",
+                         [(name, key, json.dumps(fields, ensure_ascii=False)) for key, fields in rows])
+
+def fetch_history(sheetId, name, gid, date_col, fallback=False, session=None, query=None, full=False,
+                  key=None) -> bytes:
+    """
+    CSV zakładki z szeregiem czasowym (`date_col` - kolumna dat) z lokalnej historii:
+    z arkusza pobierany jest tylko ogon od ostatniej zapisanej daty (zapytanie "since",
+    gviz tq= where <data> >= ...), który nadpisuje ostatni dzień i dopisuje nowe.
+    Cała zakładka jest pobierana (i zastępuje historię), gdy historii jeszcze nie ma,
+    minęło config.HISTORY_FULL_SYNC s od ostatniej pełnej synchronizacji, zmienił się
+    nagłówek albo ogon nie zaczyna się od ostatniej zapisanej daty (usunięte/przesunięte wiersze).
+    Gdy Google nie odpowiada, zwracana jest historia bez ogona.
+
+    query – zapytanie zakładki z config.QUERIES (do pobrania ogona dochodzi "since")
+    full – wymuszenie pełnej synchronizacji
+    key – klucz zakładki w historii (domyślnie `name`; update_script: "<sheetId>:<gid>",
+          żeby zakładki o tej samej nazwie z różnych arkuszy się nie mieszały)
+    """
+    key = key or name
+    with _lock(key):
+        conn = connect()
+        try:
+            stored = load(conn, key)
+            synced = conn.execute("SELECT synced FROM tabs WHERE tab = ?", (key,)).fetchone()
+            reason = None
+            if full:
+                reason = "forced"
+            elif stored is None or not stored[1]:
+                reason = "no history"
+            elif time.time() - synced[0] > config.HISTORY_FULL_SYNC:
+                reason = "periodic check"
+
+            if reason is None:
+                header, rows = stored
+                last = rows[-1][0]
+                try:
+                    data = u.fetchTab(sheetId, name, gid, fallback, session, use_cache=False,
+                                      query={**(query or {}), "since": {date_col: last}})
+                except Exception as e:
+                    log(f"WARNING: fetching tail of {name} failed ({e!r}) → using local history up to {last}",
+                        "warning")
+                    metrics.record("fetch", name, source="history", history_rows=len(rows))
+                    return to_csv(header, rows)
+                try:
+                    tail_header, tail = parse_rows(data, date_col)
+                except ValueError:
+                    tail_header, tail = None, []
+                if tail_header != header:
+                    reason = "header changed"
+                elif not tail or tail[0][0] != last:
+                    reason = f"tail does not start at {last}"
+                else:
+                    append(conn, key, tail)
+                    merged = dict(rows)
+                    merged.update(tail)
+                    rows = sorted(merged.items())
+                    metrics.record("fetch", name, history="tail", history_rows=len(rows), tail_rows=len(tail))
+                    return to_csv(header, rows)
+
+            try:
+                data = u.fetchTab(sheetId, name, gid, fallback, session, query=query)
+            except Exception as e:
+                if stored is None or not stored[1]:
+                    raise
+                log(f"WARNING: fetching {name} failed ({e!r}) → using local history up to {stored[1][-1][0]}",
+                    "warning")
+                metrics.record("fetch", name, source="history", history_rows=len(stored[1]))
+                return to_csv(*stored)
+            try:
+                header, rows = parse_rows(data, date_col)
+            except ValueError as e:
+                log(f"WARNING: {name} cannot be kept in history ({e}) → using the full tab", "warning")
+                return data
+            if reason == "periodic check":
+                # czy arkusz zmienił coś w już zapisanej części (poprawki wstecz)
+                prefix = [row for row in rows if row[0] <= stored[1][-1][0]]
+                if checksum(prefix) != checksum(stored[1]):
+                    log(f"WARNING: history of {name} changed in the sheet → replaced", "warning")
+            replace(conn, key, header, rows)
+            log(f"History {name}: full sync ({reason}), {len(rows)} rows")
+            metrics.record("fetch", name, history="full", history_rows=len(rows))
+            return to_csv(header, rows)
+        finally:
+            conn.close()
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import threading
+import traceback
+import contextlib
+
+try:
+    import fcntl  # blokada między procesami (Passenger uruchamia kilka workerów)
+except ImportError:  # Windows - lokalnie wystarczy blokada w obrębie procesu
+    fcntl = None
+
+import config
+
+jobs_folder = config.JOBS_FOLDER
+lock_file = os.path.join(jobs_folder, "update.lock")
+current_file = os.path.join(jobs_folder, "current")
+# zadanie czekające na koniec trwającego (zlecone, gdy trwająca aktualizacja go nie obejmowała)
+pending_file = os.path.join(jobs_folder, "pending")
+queue_lock_file = os.path.join(jobs_folder, "queue.lock")
+
+_thread_lock = threading.Lock()
+_queue_thread_lock = threading.Lock()
+
+def merge_args(a, b) -> dict:
+    """Argumenty zadania, które robi to, co `a` i `b` (suma targets, None = wszystko; force, jeśli któreś)."""
+    targets = None
+    if a.get("targets") is not None and b.get("targets") is not None:
+        targets = list(dict.fromkeys([*a["targets"], *b["targets"]]))
+    merged = {"targets": targets} if targets is not None else {}
+    if a.get("force") or b.get("force"):
+        merged["force"] = True
+    return merged
+
+def covers(running_args, kwargs) -> bool:
+    """Czy trwające zadanie (argumenty `running_args`) robi też to, o co prosi `kwargs` (targets)."""
+    running, wanted = running_args.get("targets"), kwargs.get("targets")
+    if running is None:
+        return True
+    return wanted is not None and set(wanted) <= set(running)
+
+def _job_path(job_id):
+    return os.path.join(jobs_folder, f"{job_id}.json")
+
+def _write(path, text):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def _save(job):
+    _write(_job_path(job["id"]), json.dumps(job))
+
+def get_status(job_id) -> dict | None:
+    """Stan zadania (z dowolnego procesu) albo None, gdy nie ma takiego id."""
+    if not all(ch.isalnum() for ch in job_id):
+        return None
+    try:
+        with open(_job_path(job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _try_lock():
+    """Zwraca otwarty plik z blokadą albo None, jeśli aktualizacja już trwa."""
+    if not _thread_lock.acquire(blocking=False):
+        return None
+    f = open(lock_file, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            _thread_lock.release()
+            return None
+    return f
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    f.close()
+    _thread_lock.release()
+
+@contextlib.contextmanager
+def _queue_lock():
+    """
+    Krótka blokada (czekająca) wokół kolejki: zlecenie zadania i koniec zadania
+    (odebranie czekającego albo zwolnienie blokady aktualizacji) nie mogą się przeplatać,
+    inaczej zlecenie dopisane w chwili kończenia zadania nikt by nie uruchomił.
+    """
+    with _queue_thread_lock:
+        with open(queue_lock_file, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+def _new_job(kwargs) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "state": "queued",
+        "stage": "queued",
+        "args": kwargs,
+        "started": time.time(),
+        "finished": None,
+        "duration": None,
+        "result": None,
+    }
+
+def _take_pending() -> dict | None:
+    """Czekające zadanie (usunięte z kolejki) albo None. Tylko pod _queue_lock."""
+    try:
+        with open(pending_file, encoding="utf-8") as f:
+            job_id = f.read().strip()
+        os.remove(pending_file)
+    except OSError:
+        return None
+    return get_status(job_id)
+
+def _enqueue(kwargs) -> tuple[dict, bool]:
+    """Dopisuje zlecenie do czekającego zadania (albo tworzy je). Tylko pod _queue_lock."""
+    job = _take_pending()
+    created = job is None
+    if created:
+        job = _new_job(kwargs)
+        job["stage"] = "waiting for the running update"
+    else:
+        job["args"] = merge_args(job["args"], kwargs)
+    _save(job)
+    _write(pending_file, job["id"])
+    return job, created
+
+def _current_job():
+    # id zapisuje proces, który trzyma blokadę - pod _queue_lock, razem z jej założeniem
+    try:
+        with open(current_file, encoding="utf-8") as f:
+            job = get_status(f.read().strip())
+    except OSError:
+        return None
+    if job and job["state"] in ("queued", "running"):
+        return job
+    return None
+
+def _execute(job):
+    def on_stage(stage):
+        job["stage"] = stage
+        _save(job)
+
+    kwargs = job["args"]
+    try:
+        job["state"] = "running"
+        job["started"] = time.time()
+        on_stage("import")
+        if config.PORTFOLIOS:
+            import src.batch as batch
+            job["result"] = batch.run_batch(on_stage=on_stage, **kwargs)
+        else:
+            import src.update_script as us
+            job["result"] = us.run_update(on_stage=on_stage, **kwargs)
+        job["state"] = "error" if job["result"].get("error") else "done"
+    except Exception:
+        job["state"] = "error"
+        job["result"] = {"error": traceback.format_exc()}
+    finally:
+        job["stage"] = "finished"
+        job["finished"] = time.time()
+        job["duration"] = round(job["finished"] - job["started"], 3)
+        _save(job)
+
+def _run(job, lock):
+    # po zadaniu - czekające (zlecone w trakcie), bez zwalniania blokady aktualizacji
+    while job is not None:
+        _execute(job)
+        with _queue_lock():
+            job = _take_pending()
+            if job is None:
+                _unlock(lock)
+            else:
+                _write(current_file, job["id"])
+        _cleanup()
+
+def submit(**kwargs) -> tuple[dict, bool]:
+    """
+    Uruchamia run_update(**kwargs) (przy config.PORTFOLIOS: batch.run_batch) w wątku w tle
+    i od razu zwraca (job, created).
+    Jeśli aktualizacja już trwa (w tym albo innym procesie) i obejmuje zleconą
+    (pełna albo z szerszym `targets`), nowe zadanie nie powstaje - zwracany jest
+    trwający job i created=False. Jeśli jej nie obejmuje (np. webhook "/" w trakcie
+    /update/wig), zlecenie czeka w kolejce i rusza zaraz po niej; kolejne zlecenia
+    dołączają do czekającego zadania (suma targets), więc czeka najwyżej jedno.
+    """
+    os.makedirs(jobs_folder, exist_ok=True)
+    with _queue_lock():
+        lock = _try_lock()
+        if lock is None:
+            job = _current_job()
+            if job is not None and covers(job["args"], kwargs):
+                return job, False
+            # nie obejmuje albo właśnie się kończy (blokada jeszcze założona) - kolejka
+            return _enqueue(kwargs)
+
+        # czekające zadanie zostało po procesie, który skończył się w trakcie aktualizacji
+        job, created = _take_pending(), True
+        if job is not None:
+            job["args"], created = merge_args(job["args"], kwargs), False
+        else:
+            job = _new_job(kwargs)
+        _save(job)
+        _write(current_file, job["id"])
+    threading.Thread(target=_run, args=(job, lock), daemon=True).start()
+    return job, created
+
+def _cleanup(keep=config.JOBS_KEEP):
+    """Zostawia tylko `keep` najnowszych plików statusu."""
+    files = [os.path.join(jobs_folder, f) for f in os.listdir(jobs_folder) if f.endswith(".json")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        os.remove(path)
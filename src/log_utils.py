@@ -1,33 +1,150 @@
 import os
-import datetime
-import pandas as pd
-
+import sys
+import gzip
+import time
+import queue
+import atexit
 import shutil
+import logging
+import threading
+import logging.handlers
+
+try:
+    import fcntl  # blokada między procesami piszącymi do jednego logu
+except ImportError:  # Windows - lokalnie jeden proces
+    fcntl = None
 
 import config
 
 log_file = config.LOG_FILE
 
-wp_folder = config.WP_FOLDER
-plots_folder = config.PLOTS_FOLDER
-backup_folder = config.BACKUP_FOLDER
-
-backup_path = os.path.join(wp_folder, backup_folder)
-output_path = os.path.join(wp_folder, plots_folder)
-
-def log(msg):
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] {msg}"
-    with open(log_file, "a") as f:
-        f.write(line + "\n")
-    print(line)
-    
-def weekly_backup():
-    os.makedirs(backup_path, exist_ok=True)
-    for file in os.listdir(output_path):
-        if file.endswith(".html"):
-            src = os.path.join(output_path, file)
-            dst = os.path.join(backup_path, file)
-            shutil.copy2(src, dst)
-
-    log(f"Weekly backup created: {backup_path}")
\ No newline at end of file
+_logger = None
+_listener = None
+_pid = None
+_lock = threading.Lock()
+
+def _gzip_rotator(source, dest):
+    # stary segment logu kompresujemy (w wątku listenera, nie w wątku wołającym log())
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+class _SharedRotation:
+    """
+    Rotacja pliku, do którego piszą różne procesy (workery Passengera, CLI, zadania w tle):
+    zapis i rotacja idą pod fcntl.flock na <log>.lock, a przed zapisem plik jest otwierany
+    od nowa, gdy inny proces już go zrotował (inny i-węzeł - jak WatchedFileHandler).
+    Bez tego proces ze starym deskryptorem pisałby do usuniętego segmentu.
+    """
+    _lock_file = None
+
+    def emit(self, record):
+        try:
+            if fcntl is not None:
+                if self._lock_file is None:
+                    self._lock_file = open(f"{self.baseFilename}.lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._reopen_if_rotated()
+                if self.shouldRollover(record):
+                    self.doRollover()
+                logging.FileHandler.emit(self, record)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def _reopen_if_rotated(self):
+        if self.stream is None:
+            return
+        try:
+            st, own = os.stat(self.baseFilename), os.fstat(self.stream.fileno())
+            rotated = (st.st_dev, st.st_ino) != (own.st_dev, own.st_ino)
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = self._open()
+            if isinstance(self, logging.handlers.TimedRotatingFileHandler):
+                # rotację tego okresu zrobił już inny proces
+                self.rolloverAt = self.computeRollover(int(time.time()))
+
+    def close(self):
+        super().close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+class _SizeRotatingHandler(_SharedRotation, logging.handlers.RotatingFileHandler):
+    pass
+
+class _TimeRotatingHandler(_SharedRotation, logging.handlers.TimedRotatingFileHandler):
+    pass
+
+def _file_handler():
+    if config.LOG_ROTATE == "time":
+        handler = _TimeRotatingHandler(
+            log_file, when=config.LOG_ROTATE_WHEN, backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8")
+    else:
+        handler = _SizeRotatingHandler(
+            log_file, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8")
+    handler.namer = lambda name: name + ".gz"
+    handler.rotator = _gzip_rotator
+    return handler
+
+def get_logger() -> logging.Logger:
+    """
+    Logger "hossa": log() tylko wrzuca rekord do kolejki, a zapis do pliku
+    (z rotacją i kompresją starych segmentów) i na stdout robi wątek w tle.
+    Po forku (RENDER_EXECUTOR="process") proces potomny stawia własny wątek.
+    """
+    global _logger, _listener, _pid
+    with _lock:
+        if _logger is None or _pid != os.getpid():
+            os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+            formatter = logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S")
+            handlers = [_file_handler()]
+            if config.LOG_STDOUT:
+                handlers.append(logging.StreamHandler(sys.stdout))
+            for handler in handlers:
+                handler.setFormatter(formatter)
+
+            q = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(q, *handlers)
+            _listener.start()
+
+            logger = logging.getLogger("hossa")
+            logger.handlers = [logging.handlers.QueueHandler(q)]
+            logger.setLevel(config.LOG_LEVEL)
+            logger.propagate = False
+            _logger, _pid = logger, os.getpid()
+    return _logger
+
+def stop():
+    """
+    Dopisuje kolejkę do pliku i zamyka handlery (atexit; procesy kończone przez os._exit,
+    np. z multiprocessing, muszą wołać same). Kolejny log() stawia logger od nowa.
+    """
+    global _logger, _listener
+    with _lock:
+        if _listener is not None and _pid == os.getpid():
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+        _logger, _listener = None, None
+
+atexit.register(stop)
+
+def log(msg, level=logging.INFO):
+    """level: liczba z `logging` albo nazwa ("debug", "info", "warning", "error")."""
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    get_logger().log(level, msg)
+
+def debug(msg):
+    log(msg, logging.DEBUG)
+
+def is_debug() -> bool:
+    # żeby nie budować dużych komunikatów (np. df.to_string()), które i tak nie trafią do logu
+    return get_logger().isEnabledFor(logging.DEBUG)
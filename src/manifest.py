@@ -0,0 +1,82 @@
+import os
+import json
+import hashlib
+
+import config
+
+manifest_file = config.MANIFEST_FILE
+
+# podbić, gdy zmienia się sposób renderowania (wymusza przebudowę wszystkiego)
+RENDER_VERSION = 1
+
+def input_hash(name, tabs, params) -> str:
+    """
+    Hash wejść artefaktu: nazwa, surowe bajty zakładek, parametry renderowania
+    (fontsize, kolory, ...) i RENDER_VERSION.
+    """
+    h = hashlib.sha256()
+    h.update(f"{RENDER_VERSION}:{name}".encode())
+    for data in tabs:
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def load_manifest(path=manifest_file) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # uszkodzony manifest = przebuduj wszystko
+
+def save_manifest(manifest, path=manifest_file):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def entry(h, files) -> dict:
+    return {"hash": h, "files": files}
+
+def is_fresh(manifest, key, h, output_path) -> bool:
+    """
+    Artefakt jest aktualny, gdy hash wejść się zgadza i wszystkie pliki,
+    które wtedy powstały, nadal są w `output_path`.
+    """
+    e = manifest.get(key)
+    if not isinstance(e, dict) or e.get("hash") != h or not e.get("files"):
+        return False
+    return all(os.path.exists(os.path.join(output_path, f)) for f in e["files"])
+
+def superseded(old, new) -> list[str]:
+    """
+    Pliki starego wpisu, których nowy już nie ma. Zostają w folderze jeszcze do następnej
+    przebudowy artefaktu (nowy wpis: "retired") - strona pobrana przed publikacją może o nie
+    poprosić (np. paczki portfolio_vs_wig połączone w większą).
+    """
+    if not isinstance(old, dict):
+        return []
+    return sorted(set(old.get("files") or []) - set(new.get("files") or []))
+
+def orphans(manifest, previous, output_path) -> list[str]:
+    """
+    Pliki, które przebudowane artefakty miały poprzednio (`previous`: klucz -> stary wpis,
+    razem z jego "retired"), a których nie ma już w żadnym wpisie manifestu z folderu
+    `output_path` (ani w "files", ani w "retired") - do usunięcia z niego.
+    """
+    used = set()
+    for key, e in manifest.items():
+        if isinstance(e, dict) and os.path.dirname(key) == output_path:
+            used.update(e.get("files") or [])
+            used.update(e.get("retired") or [])
+    old = set()
+    for e in previous.values():
+        if isinstance(e, dict):
+            old.update(e.get("files") or [])
+            old.update(e.get("retired") or [])
+    # pliki ukryte (.htaccess itp.) należą do operatora serwera, nawet jeśli starsze
+    # wersje wpisywały je do manifestu
+    return sorted(name for name in old - used if not name.startswith("."))
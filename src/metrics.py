@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import config
+
+metrics_file = config.METRICS_FILE
+metrics_history = config.METRICS_HISTORY
+
+_lock = threading.Lock()
+_run = None
+# rekord aktualnie mierzonego etapu w danym wątku (np. pobranie zakładki) - do incr()
+_current = contextvars.ContextVar("metrics_current", default=None)
+# prefiks nazw zapisywanych w danym wątku (portfel w trybie wielu portfeli, src.batch)
+_scope = contextvars.ContextVar("metrics_scope", default=None)
+
+def start_run(**labels):
+    """Zaczyna zbieranie metryk nowego uruchomienia run_update()."""
+    global _run
+    with _lock:
+        _run = {"started": time.time(), "labels": labels, "fetch": {}, "render": {}, "stage": {}}
+
+@contextmanager
+def scope(prefix):
+    """W bloku nazwy w record()/timer() dostają prefiks "<prefix>/" (prefix=None: bez zmian)."""
+    token = _scope.set(prefix)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+def record(kind, name, **values):
+    """Dopisuje wartości do metryk `kind`/`name` bieżącego uruchomienia (bez uruchomienia: nic)."""
+    prefix = _scope.get()
+    if prefix:
+        name = f"{prefix}/{name}"
+    with _lock:
+        if _run is not None:
+            _run.setdefault(kind, {}).setdefault(name, {}).update(values)
+
+@contextmanager
+def timer(kind, name, **values):
+    """
+    Mierzy czas bloku i zapisuje go jako `seconds` w metrykach `kind`/`name`.
+    Zwraca słownik, do którego blok może dopisać własne wartości (bytes, source, ...).
+    """
+    rec = dict(values)
+    token = _current.set(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["seconds"] = round(time.perf_counter() - t0, 6)
+        _current.reset(token)
+        record(kind, name, **rec)
+
+def mark_stage(name):
+    """Kończy poprzedni etap bieżącego uruchomienia (zapisuje jego czas) i zaczyna `name`."""
+    now = time.perf_counter()
+    with _lock:
+        if _run is None:
+            return
+        previous = _run.pop("_stage", None)
+        if previous is not None:
+            _run["stage"][previous[0]] = {"seconds": round(now - previous[1], 6)}
+        if name is not None:
+            _run["_stage"] = (name, now)
+
+def incr(key, n=1):
+    """Zwiększa licznik w rekordzie etapu mierzonego przez timer() w tym wątku."""
+    rec = _current.get()
+    if rec is not None:
+        rec[key] = rec.get(key, 0) + n
+
+def finish_run(**summary) -> dict | None:
+    """Zamyka uruchomienie i zapisuje je do METRICS_FILE (ostatnie) i METRICS_HISTORY (jsonl)."""
+    global _run
+    mark_stage(None)
+    with _lock:
+        run, _run = _run, None
+    if run is None:
+        return None
+    run.update(summary)
+    run["seconds"] = round(time.time() - run["started"], 6)
+
+    line = json.dumps(run, ensure_ascii=False)
+    os.makedirs(os.path.dirname(metrics_file) or ".", exist_ok=True)
+    tmp = f"{metrics_file}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(line)
+    os.replace(tmp, metrics_file)
+    with open(metrics_history, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+    return run
+
+def load_last_run(path=metrics_file) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Prometheus (format tekstowy 0.0.4)
+PROM_METRICS = [
+    # nazwa, typ, opis
+    ("hossa_run_timestamp_seconds", "gauge", "Start time of the last update run."),
+    ("hossa_run_seconds", "gauge", "Wall time of the last update run."),
+    ("hossa_run_artifacts", "gauge", "Artifacts of the last run by outcome."),
+    ("hossa_run_error", "gauge", "1 if the last run reported an error."),
+    ("hossa_stage_seconds", "gauge", "Duration of each stage of the last run."),
+    ("hossa_fetch_seconds", "gauge", "Duration of the last fetch of each tab."),
+    ("hossa_fetch_bytes", "gauge", "Size of the last fetched CSV of each tab."),
+    ("hossa_fetch_retries", "gauge", "Retries of the last fetch of each tab ('Ładuję...' placeholder)."),
+    ("hossa_render_seconds", "gauge", "Render time of each artifact rebuilt in the last run."),
+    ("hossa_parse_seconds", "gauge", "CSV parse time of each artifact rebuilt in the last run."),
+    ("hossa_render_bytes", "gauge", "Output size of each artifact rebuilt in the last run."),
+    ("hossa_render_original_bytes", "gauge", "Output size of each rebuilt artifact before minification."),
+    ("hossa_render_compressed_bytes", "gauge", "Size of the precompressed copies (.gz/.br) of each rebuilt artifact."),
+]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _split(label, name) -> dict:
+    # "portfel/wig" (src.batch) -> {"portfolio": "portfel", "tab": "wig"}
+    portfolio, _, name = name.rpartition("/")
+    return {"portfolio": portfolio, label: name} if portfolio else {label: name}
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def prometheus_text(run=None) -> str:
+    """Metryki ostatniego uruchomienia w formacie tekstowym Prometheusa."""
+    run = run if run is not None else load_last_run()
+    samples = {name: [] for name, _, _ in PROM_METRICS}
+    if run is not None:
+        base = run.get("labels", {})
+        samples["hossa_run_timestamp_seconds"].append((base, run["started"]))
+        samples["hossa_run_seconds"].append((base, run["seconds"]))
+        for outcome in ("rebuilt", "unchanged", "failed"):
+            samples["hossa_run_artifacts"].append(({**base, "outcome": outcome}, len(run.get(outcome, []))))
+        samples["hossa_run_error"].append((base, int(bool(run.get("error")))))
+        for stage, rec in run.get("stage", {}).items():
+            samples["hossa_stage_seconds"].append(({**base, "stage": stage}, rec["seconds"]))
+        for tab, rec in run.get("fetch", {}).items():
+            tab_labels = {**base, **_split("tab", tab)}
+            samples["hossa_fetch_seconds"].append(({**tab_labels, "source": rec.get("source", "")}, rec.get("seconds", 0)))
+            samples["hossa_fetch_bytes"].append((tab_labels, rec.get("bytes", 0)))
+            samples["hossa_fetch_retries"].append((tab_labels, max(0, rec.get("attempts", 1) - 1)))
+        for artifact, rec in run.get("render", {}).items():
+            labels = {**base, **_split("artifact", artifact)}
+            samples["hossa_render_seconds"].append((labels, rec.get("seconds", 0)))
+            samples["hossa_parse_seconds"].append((labels, rec.get("parse_seconds", 0)))
+            samples["hossa_render_bytes"].append((labels, rec.get("bytes", 0)))
+            samples["hossa_render_original_bytes"].append((labels, rec.get("original_bytes", rec.get("bytes", 0))))
+            for kind in ("gz", "br"):
+                if f"{kind}_bytes" in rec:
+                    samples["hossa_render_compressed_bytes"].append(({**labels, "encoding": kind}, rec[f"{kind}_bytes"]))
+
+    lines = []
+    for name, kind, help_text in PROM_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines += [f"{name}{_labels(**labels)} {value}" for labels, value in samples[name]]
+    return "\n".join(lines) + "\n"
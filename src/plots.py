@@ -1,15 +1,63 @@
 import pandas as pd
 import numpy as np
 
-from matplotlib.patches import Patch
 import plotly.graph_objects as go
-
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import plotly.io as pio
 
 import src.utils as u
 import src.colors as c
 import os
+import json
+import hashlib
+from html import escape
+from functools import lru_cache
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+try:
+    import orjson  # opcjonalnie: szybszy zapis JSON (output="json")
+except ImportError:
+    orjson = None
+
+import config
+
+def _write_table(f, df: pd.DataFrame, link=None, chunk_rows=1000):
+    """
+    Zapisuje do `f` nagłówki i wiersze tabeli (od "<th>" do ostatniego "</tr>").
+    Komórki są budowane kolumnami (bez iterrows), a wiersze zapisywane
+    paczkami po `chunk_rows`, bez sklejania całego dokumentu w jeden string.
+    - treść komórek i nagłówków jest escapowana (&, <, >)
+    - jeśli `link` jest kolumną df: wartości w kolumnie poprzedzającej dostają
+      <a href="..."> z tej kolumny, a sama kolumna `link` nie jest wypisywana
+    """
+    link_idx = None
+    if link and link in df.columns:
+        link_idx = df.columns.get_loc(link)
+    keep = [i for i in range(df.shape[1]) if i != link_idx]
+
+    # nagłówki (bez kolumny linkowej)
+    f.write("".join(f"<th>{escape(str(df.columns[i]), quote=False)}</th>" for i in keep))
+    f.write("</tr></thead><tbody>")
+
+    # komórki kolumnami
+    columns = []
+    for i in keep:
+        values = [escape(str(v), quote=False) for v in df.iloc[:, i].tolist()]
+        if link_idx and i == link_idx - 1:
+            urls = [escape(str(v)) for v in df.iloc[:, link_idx].tolist()]
+            columns.append([f'<td><a href="{url}" target="_blank">{val}</a></td>'
+                            for url, val in zip(urls, values)])
+        else:
+            columns.append([f"<td>{val}</td>" for val in values])
+
+    n = len(df)
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        if columns:
+            rows = ("<tr>" + "".join(cells) + "</tr>"
+                    for cells in zip(*(col[start:stop] for col in columns)))
+        else:
+            rows = ("<tr></tr>" for _ in range(start, stop))
+        f.write("".join(rows))
 
 def table2html(df: pd.DataFrame, title="table", fontsize=14, link=None, path=""):
     """
@@ -78,36 +126,8 @@ def table2html(df: pd.DataFrame, title="table", fontsize=14, link=None, path="")
                 <tr>
     """
 
-    # jeśli mamy linkową kolumnę
-    link_idx = None
-    if link and link in df.columns:
-        link_idx = df.columns.get_loc(link)
-
-    # nagłówki (bez kolumny linkowej)
-    for i, col in enumerate(df.columns):
-        if i == link_idx:
-            continue
-        html += f"<th>{col}</th>"
-    html += "</tr></thead><tbody>"
-
-    # wiersze
-    for _, row in df.iterrows():
-        html += "<tr>"
-        for i, (col, val) in enumerate(row.items()):
-            if i == link_idx:
-                continue
-            if link_idx and i == link_idx - 1:  
-                # dodajemy link do wartości w kolumnie poprzedzającej
-                url = row.iloc[link_idx]
-                html += f'<td><a href="{url}" target="_blank">{val}</a></td>'
-            else:
-                html += f"<td>{val}</td>"
-        html += "</tr>"
-
-    html += "</tbody></table></div>"
-
     # JS na dopasowanie wysokości do okna
-    html += """
+    tail = """</tbody></table></div>
     <script>
         const container = document.getElementById('table-container');
         function resizeTable() {
@@ -116,12 +136,12 @@ def table2html(df: pd.DataFrame, title="table", fontsize=14, link=None, path="")
         window.addEventListener('resize', resizeTable);
         resizeTable();
     </script>
-    """
-
-    html += "</body></html>"
+    </body></html>"""
 
     with open(f"{path}/{title}.html", "w", encoding="utf-8") as f:
         f.write(html)
+        _write_table(f, df, link)
+        f.write(tail)
 
     print(f"Plik {title}.html zapisany!")
 
@@ -193,55 +213,125 @@ def vals2html(df: pd.DataFrame, title="table", fontsize=17, link=None, path=""):
                 <tr>
     """
 
-    # links handling
-    link_idx = None
-    if link and link in df.columns:
-        link_idx = df.columns.get_loc(link)
-
-    # headers but withut links
-    for i, col in enumerate(df.columns):
-        if i == link_idx:
-            continue
-        html += f"<th>{col}</th>"
-    html += "</tr></thead><tbody>"
-
-    for _, row in df.iterrows():
-        html += "<tr>"
-        for i, (col, val) in enumerate(row.items()):
-            if i == link_idx:
-                continue
-            if link_idx and i == link_idx - 1:  
-                url = row.iloc[link_idx]
-                html += f'<td><a href="{url}" target="_blank">{val}</a></td>'
-            else:
-                html += f"<td>{val}</td>"
-        html += "</tr>"
-
-    html += "</tbody></table></div></body></html>"
-
     with open(f"{path}/{title}.html", "w", encoding="utf-8") as f:
         f.write(html)
+        _write_table(f, df, link)
+        f.write("</tbody></table></div></body></html>")
 
     print(f"Plik {title}.html zapisany!")
 
-def portfolio_vs_wig(df: pd.DataFrame, title="portfolio_vs_wig", fontsize=17, height=450, path = ""):
+@lru_cache(maxsize=1)
+def _plotlyjs():
+    # plotly.min.js z zainstalowanej paczki plotly + nazwa z hashem treści
+    js = get_plotlyjs()
+    return f"plotly-{hashlib.sha256(js.encode()).hexdigest()[:12]}.min.js", js
+
+def plotlyjs_bundle(path) -> str:
     """
-    Interaktywny wykres HTML pokazujący wyniki portfela vs benchmark.
-    Format:
-    - czcionka Arial
-    - kolory (#304536 portfel, #852029 benchmark)
-    - hover w %
-    - szeroki, responsywny wykres
-    - x-axis wizualnie przy y=0 z tylko pierwszą i ostatnią etykietą (wyrównanie do lewej/prawej)
+    Zapisuje do `path` plotly.min.js pod nazwą z hashem treści (plotly-<hash>.min.js)
+    i zwraca tę nazwę. Nazwa zmienia się tylko przy zmianie wersji plotly, więc
+    przeglądarka może go cache'ować bez końca (nagłówek Cache-Control "immutable"
+    ustawia serwer - patrz README).
+    """
+    name, js = _plotlyjs()
+    with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+        f.write(js)
+    return name
+
+CHART_LOADER = """<html>
+<head>
+<meta charset="UTF-8">
+<style>
+    html, body {{ margin: 0; padding: 0; width: 100%; height: 100%; }}
+    #chart {{ width: 100%; height: 100%; }}
+</style>
+<script charset="utf-8" src="{plotlyjs_src}"></script>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+    // chart.html?src=<nazwa> -> rysuje wykres z <nazwa>.json
+    const src = new URLSearchParams(window.location.search).get("src");
+    if (src && /^[\\w-]+$/.test(src)) {{
+        fetch(src + ".json")
+            .then(response => response.json())
+            .then(fig => Plotly.newPlot("chart", fig.data, fig.layout, {{responsive: true}}));
+    }}
+</script>
+</body></html>
+"""
+
+def _compact(obj, decimals):
+    # zaokrąglenie liczb, 1.0 -> 1, "2024-01-02T00:00:00" -> "2024-01-02"
+    if isinstance(obj, float):
+        obj = round(obj, decimals)
+        return int(obj) if obj.is_integer() else obj
+    if isinstance(obj, str):
+        return obj[:-9] if obj.endswith("T00:00:00") else obj
+    if isinstance(obj, list):
+        return [_compact(v, decimals) for v in obj]
+    if isinstance(obj, dict):
+        return {k: _compact(v, decimals) for k, v in obj.items()}
+    return obj
+
+def compact_figure(fig, decimals=3) -> dict:
+    """Figura jako dict ({"data": ..., "layout": ...}) z liczbami zaokrąglonymi do `decimals` miejsc."""
+    return _compact(json.loads(fig.to_json()), decimals)
+
+def figure_json(fig, decimals=3) -> bytes:
     """
+    Zwarty JSON figury ({"data": ..., "layout": ...}): liczby zaokrąglone do
+    `decimals` miejsc, daty bez zerowej godziny, bez spacji. Używa orjson, jeśli jest.
+    """
+    fig_dict = compact_figure(fig, decimals)
+    if orjson is not None:
+        return orjson.dumps(fig_dict)
+    return json.dumps(fig_dict, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
-    # remove nans and formatting 
-    for col in df.columns:
-        if col != "Data":
-            df[col] = u.str2float(df[col])
-    df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
-    df = df.dropna()
+def _save_figure(fig, path, title, plotlyjs=None, output=None, decimals=None):
+    """
+    Zapisuje wykres.
+    plotlyjs – "cdn" (plotly.js z cdn.plot.ly) albo "self" (wspólny plik
+               plotly-<hash>.min.js obok wykresów); domyślnie config.PLOTLYJS
+    output – "html" (samodzielny <title>.html), "json" (<title>.json + wspólny
+             chart.html?src=<title>) albo "both"; domyślnie config.CHART_OUTPUT
+    decimals – zaokrąglenie liczb w JSON; domyślnie config.CHART_DECIMALS
+    div_id jest stały, więc te same dane dają identyczny plik
+    (publish.publish pomija wtedy zapis). Przy config.OUTPUT_MINIFY także
+    <title>.html dostaje figurę z liczbami zaokrąglonymi do `decimals` miejsc.
+    """
+    plotlyjs = plotlyjs or config.PLOTLYJS
+    output = output or config.CHART_OUTPUT
+    decimals = config.CHART_DECIMALS if decimals is None else decimals
+    include_plotlyjs = plotlyjs_bundle(path) if plotlyjs == "self" else "cdn"
+
+    if output in ("html", "both"):
+        full_path = os.path.join(path, f"{title}.html")
+        figure = compact_figure(fig, decimals) if config.OUTPUT_MINIFY else fig
+        pio.write_html(
+            figure,
+            full_path,
+            include_plotlyjs=include_plotlyjs,
+            full_html=True,
+            config={"responsive": True},
+            div_id=title,
+            validate=False
+        )
+        print(f"Saved new plot: {full_path}")
+
+    if output in ("json", "both"):
+        full_path = os.path.join(path, f"{title}.json")
+        with open(full_path, "wb") as f:
+            f.write(figure_json(fig, decimals))
+        if include_plotlyjs == "cdn":
+            plotlyjs_src = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+        else:
+            plotlyjs_src = include_plotlyjs
+        with open(os.path.join(path, "chart.html"), "w", encoding="utf-8") as f:
+            f.write(CHART_LOADER.format(plotlyjs_src=plotlyjs_src))
+        print(f"Saved new plot: {full_path}")
 
+def _wig_figure(df: pd.DataFrame, fontsize, height) -> go.Figure:
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=df["Data"], y=df["Stopa zwrotu portfela"],
@@ -314,37 +404,197 @@ def portfolio_vs_wig(df: pd.DataFrame, title="portfolio_vs_wig", fontsize=17, he
         ),
         margin=dict(l=50, r=50, t=30, b=50)
     )
+    return fig
 
-    full_path = os.path.join(path, f"{title}.html")
-    if os.path.exists(full_path):
-        os.remove(full_path)
-        print(f"Removed existing file: {full_path}")
-
-    fig.write_html(
-        full_path,
-        include_plotlyjs="cdn",
-        full_html=True,
-        config={
-            "responsive": True
-            }
-    )
-    print(f"Saved new plot: {full_path}")
+def portfolio_vs_wig(df: pd.DataFrame, title="portfolio_vs_wig", fontsize=17, height=450, path = "", max_points=None,
+                     plotlyjs=None, output=None, decimals=None, incremental=False, chunk_rows=None,
+                     chunk_fanout=None, reuse_dir=None):
+    """
+    Interaktywny wykres HTML pokazujący wyniki portfela vs benchmark.
+    Format:
+    - czcionka Arial
+    - kolory (#304536 portfel, #852029 benchmark)
+    - hover w %
+    - szeroki, responsywny wykres
+    - x-axis wizualnie przy y=0 z tylko pierwszą i ostatnią etykietą (wyrównanie do lewej/prawej)
+    - max_points: jeśli podane, seria jest zmniejszana LTTB do ~max_points punktów
+      (pierwszy, ostatni punkt i ekstrema zostają), więc rozmiar HTML nie rośnie z historią
+    - plotlyjs / output / decimals: sposób zapisu, patrz _save_figure
+    - incremental: zamiast jednej strony - strona ładująca punkty z plików obok,
+      dopisywanych przyrostowo (patrz _save_series; output nie ma wtedy znaczenia, a max_points
+      ogranicza każdą zamkniętą paczkę osobno)
+    - chunk_rows / chunk_fanout: podział punktów na paczki (series_chunks)
+    - reuse_dir: folder z opublikowanymi plikami - paczki, które już tam są, nie są zapisywane
+    
+    Zwraca nazwy plików z `reuse_dir`, których wykres używa bez zapisywania ich od nowa.
+    """
 
-def donut(df, val_col, label_col, colors=None, title=None, fontsize=12, path = ""):
+    # remove nans and formatting (kolumny otypowane przy wczytaniu - config.SCHEMAS - zostają bez zmian)
+    df = df.assign(**{col: u.str2float(df[col]) for col in df.columns if col != "Data"})
+    if not pd.api.types.is_datetime64_any_dtype(df["Data"]):
+        df["Data"] = pd.to_datetime(df["Data"], errors="coerce")
+    df = df.dropna()
+
+    if incremental:
+        df = df.sort_values("Data", kind="stable")
+        # szkielet figury bez punktów (adnotacje i linia zera z pierwszego i ostatniego dnia)
+        fig = _wig_figure(df.iloc[[0, -1]], fontsize, height)
+        return _save_series(fig, df, path, title, plotlyjs, decimals, (chunk_rows, chunk_fanout), reuse_dir,
+                            max_points)
+
+    df = u.downsample(df, "Data", [df.columns[1], df.columns[2]], max_points)
+    fig = _wig_figure(df, fontsize, height)
+    _save_figure(fig, path, title, plotlyjs, output, decimals)
+    return []
+
+SERIES_LOADER = """<html>
+<head>
+<meta charset="UTF-8">
+<style>
+    html, body {{ margin: 0; padding: 0; width: 100%; height: 100%; }}
+    #chart {{ width: 100%; height: 100%; }}
+</style>
+<script charset="utf-8" src="{plotlyjs_src}"></script>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+    // {title}.figure.json - wygląd wykresu, {title}.tail.json - lista paczek z punktami,
+    // ostatnie punkty i zmienna część układu; wiersz paczki = [x, y serii 1, y serii 2, ...].
+    // figure/tail zmieniają się w miejscu - zawsze sprawdzane na serwerze (no-cache);
+    // paczki mają nazwy z hashem treści, więc mogą być brane z cache
+    const load = (name, cache) => fetch(name, {{cache: cache || "default"}}).then(response => {{
+        if (!response.ok) throw new Error(name + ": HTTP " + response.status);
+        return response.json();
+    }});
+    Promise.all([load("{title}.figure.json", "no-cache"), load("{title}.tail.json", "no-cache")]).then(([fig, tail]) =>
+        Promise.all(tail.chunks.map(name => load(name))).then(chunks => {{
+            const rows = [].concat(...chunks, tail.rows);
+            fig.data.forEach((trace, i) => {{
+                trace.x = rows.map(row => row[0]);
+                trace.y = rows.map(row => row[i + 1]);
+            }});
+            Object.assign(fig.layout, tail.layout);
+            Plotly.newPlot("chart", fig.data, fig.layout, {{responsive: true}});
+        }})).catch(error => {{
+            console.error(error);
+            document.getElementById("chart").textContent = "Nie udało się wczytać wykresu (" + error.message + "). Odśwież stronę.";
+        }});
+</script>
+</body></html>
+"""
+
+def series_chunks(n, base=None, fanout=None) -> list[tuple[int, int]]:
+    """
+    Podział n wierszy na zamknięte paczki (start, rozmiar) o rozmiarach base * fanout^k,
+    od największych (jak licznik o podstawie `fanout`) + ogon < base wierszy poza paczkami.
+    Granice paczek nie zależą od kolejnych wierszy, więc dopisywanie dni nie zmienia
+    już zamkniętych paczek - co `base` dni powstaje nowa mała, a `fanout` małych łączy się w jedną większą.
+    """
+    base = base or config.SERIES_CHUNK_ROWS
+    fanout = fanout or config.SERIES_CHUNK_FANOUT
+    sizes = [base]
+    while sizes[-1] * fanout <= n:
+        sizes.append(sizes[-1] * fanout)
+    chunks, start = [], 0
+    for size in reversed(sizes):
+        while start + size <= n:
+            chunks.append((start, size))
+            start += size
+    return chunks
+
+def _series_rows(df, decimals):
+    x = [d[:-9] if d.endswith("T00:00:00") else d for d in df.iloc[:, 0].dt.strftime("%Y-%m-%dT%H:%M:%S")]
+    values = [_compact(df.iloc[:, i].tolist(), decimals) for i in range(1, df.shape[1])]
+    return [list(row) for row in zip(x, *values)]
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _save_series(fig, df, path, title, plotlyjs=None, decimals=None, chunking=(None, None), reuse_dir=None,
+                 max_points=None) -> list:
+    """
+    Zapis wykresu z punktami w plikach obok strony, dopisywanych przyrostowo:
+    - <title>.html - strona ładująca (stała)
+    - <title>.figure.json - figura bez punktów, bez adnotacji i kształtów (zmienia się tylko z parametrami)
+    - <title>.rows-<start>-<hash>.json - zamknięte paczki wierszy (series_chunks); nazwa zależy od treści,
+      więc paczka, która już jest w `reuse_dir` (opublikowana wcześniej), nie jest ani serializowana, ani zapisywana
+    - <title>.tail.json - lista paczek, wiersze spoza paczek (ostatnie dni), adnotacje i kształty
+    Dzienna aktualizacja zapisuje więc tail.json (kilkaset bajtów), a co config.SERIES_CHUNK_ROWS dni nową małą paczkę.
+    Paczki zastąpione większą zostają w folderze do kolejnej przebudowy (wpis "retired" w manifeście,
+    patrz update_script.publish_results), bo strona otwarta przed publikacją może jeszcze o nie poprosić.
+    chunking – (base, fanout) dla series_chunks
+    max_points – budżet punktów całego wykresu: zamknięta paczka dłuższa niż max_points // fanout
+                 jest zmniejszana LTTB (u.downsample) do tylu punktów, ogon i małe paczki zostają
+                 pełne. Paczki są zmniejszane osobno (każda zachowuje swój pierwszy i ostatni dzień),
+                 więc ich treść nadal nie zależy od kolejnych dni; na poziom paczek przypada
+                 najwyżej (fanout - 1) * max_points // fanout punktów, czyli ~max_points na każde
+                 fanout-krotne wydłużenie historii.
+    
+    Zwraca nazwy paczek wziętych z `reuse_dir`.
+    """
+    decimals = config.CHART_DECIMALS if decimals is None else decimals
+    include_plotlyjs = plotlyjs_bundle(path) if (plotlyjs or config.PLOTLYJS) == "self" else "cdn"
+    if include_plotlyjs == "cdn":
+        plotlyjs_src = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+    else:
+        plotlyjs_src = include_plotlyjs
+
+    skeleton = compact_figure(fig, decimals)
+    layout = {key: skeleton["layout"].pop(key) for key in ("annotations", "shapes") if key in skeleton["layout"]}
+    for trace in skeleton["data"]:
+        trace.pop("x", None)
+        trace.pop("y", None)
+
+    series = df[["Data", *df.columns[1:3]]]
+    fanout = chunking[1] or config.SERIES_CHUNK_FANOUT
+    chunk_points = max(3, max_points // fanout) if max_points else None
+    # hash wierszy liczony wektorowo raz; hash paczki = hash jej fragmentu (+ kolumny, zaokrąglenie, budżet punktów)
+    row_hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    salt = json.dumps([list(map(str, series.columns)), decimals, chunk_points]).encode()
+    chunks, reused, tail_start = [], [], 0
+    for start, size in series_chunks(len(series), *chunking):
+        tail_start = start + size
+        digest = hashlib.sha1(salt + row_hashes[start:start + size].tobytes()).hexdigest()[:12]
+        name = f"{title}.rows-{start}-{digest}.json"
+        chunks.append(name)
+        if reuse_dir and os.path.exists(os.path.join(reuse_dir, name)):
+            reused.append(name)
+            continue
+        rows = u.downsample(series.iloc[start:start + size], "Data", list(series.columns[1:]), chunk_points)
+        with open(os.path.join(path, name), "wb") as f:
+            f.write(_dumps(_series_rows(rows, decimals)))
+
+    tail = {"chunks": chunks, "rows": _series_rows(series.iloc[tail_start:], decimals), "layout": layout}
+
+    with open(os.path.join(path, f"{title}.figure.json"), "wb") as f:
+        f.write(_dumps(skeleton))
+    with open(os.path.join(path, f"{title}.tail.json"), "wb") as f:
+        f.write(_dumps(tail))
+    with open(os.path.join(path, f"{title}.html"), "w", encoding="utf-8") as f:
+        f.write(SERIES_LOADER.format(plotlyjs_src=plotlyjs_src, title=title))
+    print(f"Saved new plot: {os.path.join(path, title)}.html ({len(chunks) - len(reused)} new chunks, "
+          f"{len(reused)} reused)")
+    return reused
+
+def donut(df, val_col, label_col, colors=None, title=None, fontsize=12, path = "",
+          plotlyjs=None, output=None, decimals=None):
     """
     Tworzy donut chart w HTML z wartościami procentowymi na pierścieniu,
     etykietami na zewnątrz i legendą po prawej stronie.
     """
-    df[val_col] = u.str2float(df[val_col])
+    values = u.str2float(df[val_col])
     
     if colors is None:
         colors = [f"rgba(31,{i*10%255},200,0.8)" for i in range(len(df))]
     else:
-        colors = [mcolors.to_hex(c) for c in colors]
+        colors = [c.rgb2hex(col) for col in colors]
 
     fig = go.Figure(data=[go.Pie(
         labels=df[label_col],
-        values=df[val_col],
+        values=values,
         hole=0.5, 
         marker=dict(colors=colors, line=dict(color="white", width=1)), 
         textinfo="percent", 
@@ -367,24 +617,13 @@ def donut(df, val_col, label_col, colors=None, title=None, fontsize=12, path = "
         paper_bgcolor="white"
     )
     
-    full_path = os.path.join(path, f"{title}.html")
-    if os.path.exists(full_path):
-        os.remove(full_path)
-        print(f"Removed existing file: {full_path}")
-
-    fig.write_html(
-        full_path,
-        include_plotlyjs="cdn",
-        full_html=True,
-        config={"responsive": True}
-    )
-    print(f"Saved new plot: {full_path}")
+    _save_figure(fig, path, title, plotlyjs, output, decimals)
 
 
 def horizontal_bars(df, val_col, label_col, colors=None, 
-                              title=None, xlabel=None, fontsize=10, path = ""):
-    df[val_col] = u.str2float(df[val_col])
-    values = df[val_col].astype(float).to_numpy()
+                              title=None, xlabel=None, fontsize=10, path = "",
+                              plotlyjs=None, output=None, decimals=None):
+    values = u.str2float(df[val_col]).astype(float).to_numpy()
     labels = df[label_col].to_numpy()
     n = len(df)
 
@@ -454,15 +693,4 @@ def horizontal_bars(df, val_col, label_col, colors=None,
         bargap = 0.5,
     )
 
-    full_path = os.path.join(path, f"{title}.html")
-    if os.path.exists(full_path):
-        os.remove(full_path)
-        print(f"Removed existing file: {full_path}")
-
-    fig.write_html(
-        full_path,
-        include_plotlyjs="cdn",
-        full_html=True,
-        config={"responsive": True}
-    )
-    print(f"Saved new plot: {full_path}")
+    _save_figure(fig, path, title, plotlyjs, output, decimals)
@@ -0,0 +1,300 @@
+import os
+import re
+import gzip
+import shutil
+import hashlib
+import threading
+from concurrent.futures import Future
+
+try:
+    import brotli  # opcjonalnie: kopie .br (pip install brotli)
+except ImportError:
+    brotli = None
+
+import config
+from src.publish import same_content, COMPRESSED_SUFFIXES
+
+# pliki, które dostają skompresowane kopie obok (<plik>.gz, <plik>.br)
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt")
+
+# --- CSS ---
+
+_CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+def _minify_css_code(code):
+    code = re.sub(r"\s+", " ", code)
+    # spacja przed ":" zostaje (w selektorze "a :hover" znaczy co innego niż "a:hover")
+    code = re.sub(r" ?([{};,>]) ?", r"\1", code)
+    code = code.replace(": ", ":")
+    return code.replace(";}", "}")
+
+def minify_css(css: str) -> str:
+    """Usuwa komentarze i zbędne białe znaki; treść napisów ("...", '...') zostaje bez zmian."""
+    out, code, pos = [], [], 0
+    for m in _CSS_TOKENS.finditer(css):
+        code.append(css[pos:m.start()])
+        if m.group(1):
+            out += [_minify_css_code("".join(code)), m.group(1)]
+            code = []
+        else:
+            code.append(" ")  # komentarz działa jak biały znak
+        pos = m.end()
+    code.append(css[pos:])
+    out.append(_minify_css_code("".join(code)))
+    return "".join(out).strip()
+
+# --- JS (ostrożnie: tylko białe znaki i komentarze poza napisami i regexami) ---
+
+# znaki i słowa, po których "/" zaczyna regex, a nie dzielenie
+_REGEX_AFTER_CHARS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_AFTER_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+# białe znaki przy tych znakach można usunąć; podział linii tylko wtedy, gdy nie zmienia
+# miejsc, w których JS sam wstawia średniki (nie przed "(" i "[", nie po "}" i ")")
+_SPACE_PUNCT = set("{}()[];,:=")
+_NEWLINE_AFTER = set("{([,;:=")
+_NEWLINE_BEFORE = set("})],;:")
+
+# napis od cudzysłowu do zamykającego (albo do końca, gdy go nie ma)
+_STRINGS = {q: re.compile(r"%s(?:\\.|[^%s\\])*%s?" % (q, q, q), re.S) for q in "\"'`"}
+# ciąg zwykłych znaków kodu (bez napisów, "/" i białych znaków) - przechodzi bez zmian
+_CODE_RUN = re.compile(r"[^\s\"'`/]+")
+_WORD_END = re.compile(r"[\w$]*$")
+
+def _skip_string(js, i):
+    return _STRINGS[js[i]].match(js, i).end()
+
+def _skip_regex(js, i):
+    i, in_class = i + 1, False
+    while i < len(js) and js[i] != "\n":
+        ch = js[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        elif ch == "/" and not in_class:
+            i += 1
+            break
+        i += 1
+    while i < len(js) and (js[i].isalnum() or js[i] == "_"):  # flagi
+        i += 1
+    return i
+
+def _tokens(js):
+    """Kawałki kodu, napisy i regexy w kolejności; białe znaki jako " " albo "\\n", bez komentarzy."""
+    i, n = 0, len(js)
+    last, word = "", ""  # ostatni znak niebiały i ostatnie słowo (do rozpoznania regexu)
+    while i < n:
+        ch = js[i]
+        if ch in "\"'`":
+            j = _skip_string(js, i)
+            yield js[i:j]
+            last, word, i = ch, "", j
+        elif js.startswith("//", i):
+            j = js.find("\n", i)
+            i = n if j < 0 else j
+        elif js.startswith("/*", i):
+            j = js.find("*/", i + 2)
+            i = n if j < 0 else j + 2
+            yield " "
+        elif ch == "/" and (last == "" or last in _REGEX_AFTER_CHARS or word in _REGEX_AFTER_WORDS):
+            j = _skip_regex(js, i)
+            yield js[i:j]
+            last, word, i = "/", "", j
+        elif ch.isspace():
+            j = i
+            while j < n and js[j].isspace():
+                j += 1
+            yield "\n" if "\n" in js[i:j] else " "
+            i = j
+        else:
+            m = _CODE_RUN.match(js, i)
+            j = m.end() if m else i + 1  # "/" dzielenia
+            run = js[i:j]
+            yield run
+            tail = _WORD_END.search(run).group()
+            word = word + run if len(tail) == len(run) else tail
+            last, i = run[-1], j
+
+def minify_js(js: str) -> str:
+    """
+    Zachowawcza minifikacja skryptu: usuwa komentarze, wcięcia i zbędne białe znaki
+    poza napisami i regexami. Podziały linii, na których JS mógłby wstawić średnik, zostają.
+    """
+    out = []
+    space = None  # zaległy biały znak: " " albo "\n"
+    for tok in _tokens(js):
+        if tok in (" ", "\n"):
+            if out:
+                space = "\n" if "\n" in (tok, space) else " "
+            continue
+        if space is not None:
+            prev, nxt = out[-1][-1], tok[0]
+            if space == "\n":
+                keep = prev not in _NEWLINE_AFTER and nxt not in _NEWLINE_BEFORE
+            else:
+                keep = prev not in _SPACE_PUNCT and nxt not in _SPACE_PUNCT
+            if keep:
+                out.append(space)
+            space = None
+        out.append(tok)
+    return "".join(out)
+
+# --- HTML ---
+
+_RAW_BLOCKS = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.S | re.I)
+_COMMENT = re.compile(r"<!--.*?-->", re.S)
+# ciąg białych znaków w tekście (za nim do najbliższego "<" nie ma ">", czyli nie jesteśmy w znaczniku)
+_TEXT_SPACE = re.compile(r"\s+(?=[^<>]*(?:<|$))")
+# między tymi znacznikami białe znaki nic nie zmieniają w wyglądzie strony
+_BLOCK_TAGS = "|".join(("html", "head", "body", "meta", "title", "link", "style", "script", "div",
+                        "table", "thead", "tbody", "tfoot", "tr", "th", "td", "p", "ul", "ol", "li", "br"))
+_SPACE_BEFORE_BLOCK = re.compile(r" (?=</?(?:%s)\b)" % _BLOCK_TAGS, re.I)
+_SPACE_AFTER_BLOCK = re.compile(r"(</?(?:%s)\b[^>]*>) " % _BLOCK_TAGS, re.I)
+
+def _minify_markup(html):
+    if "<!--" in html:
+        html = _COMMENT.sub("", html)
+    html = _TEXT_SPACE.sub(" ", html)
+    html = _SPACE_BEFORE_BLOCK.sub("", html)
+    return _SPACE_AFTER_BLOCK.sub(r"\1", html)
+
+def minify_html(html: str) -> str:
+    """
+    Minifikacja HTML: usuwa komentarze i wcięcia między znacznikami blokowymi,
+    zwija białe znaki w tekście do jednej spacji (tak jak je pokazuje przeglądarka).
+    Znaczniki i atrybuty zostają bez zmian, treść <style> przechodzi przez minify_css,
+    <script> przez minify_js, a <pre>/<textarea> zostają nietknięte.
+    """
+    out, pos = [], 0
+    for m in _RAW_BLOCKS.finditer(html):
+        out.append(_minify_markup(html[pos:m.start()]))
+        tag, body = m.group(2).lower(), m.group(3)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script":
+            body = minify_js(body)
+        out.append(m.group(1) + body + m.group(4))
+        pos = m.end()
+    out.append(_minify_markup(html[pos:]))
+    return "".join(out).strip()
+
+MINIFIERS = {".html": minify_html, ".css": minify_css}
+
+# --- kompresja ---
+
+def compress(data: bytes, kind: str) -> bytes:
+    """
+    kind: "gz" albo "br". Wynik jest deterministyczny (gzip bez czasu w nagłówku),
+    więc te same dane dają identyczny plik i publish.publish go nie nadpisuje.
+    """
+    if kind == "gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if kind == "br":
+        return brotli.compress(data, quality=11)
+    raise ValueError(f"Unknown compression: {kind}")
+
+# kopie skompresowane w tym procesie: (sha256, rodzaj) -> Future z bajtami. Wspólny
+# plotly-<hash>.min.js zapisywany naraz przez kilka wykresów (i portfeli, src.batch) jest
+# kompresowany raz. Pamiętane są tylko duże pliki - małe kompresują się szybciej, niż
+# wypychałyby z pamięci plotly.js, który wraca przy każdym wykresie.
+_compressed = {}
+_compressed_lock = threading.Lock()
+COMPRESSED_MEMO = 8
+COMPRESSED_MEMO_MIN_BYTES = 256 * 1024
+
+def compress_once(data: bytes, kind: str) -> bytes:
+    """
+    compress() z pamięcią COMPRESSED_MEMO ostatnio używanych wyników dla danych od
+    COMPRESSED_MEMO_MIN_BYTES bajtów (równoległe wywołania czekają na pierwsze).
+    """
+    if len(data) < COMPRESSED_MEMO_MIN_BYTES:
+        return compress(data, kind)
+    key = (hashlib.sha256(data).digest(), kind)
+    with _compressed_lock:
+        future = _compressed.pop(key, None)
+        owner = future is None
+        if owner:
+            future = Future()
+        _compressed[key] = future  # na koniec kolejki - najdłużej nieużywane wypadają pierwsze
+        while len(_compressed) > COMPRESSED_MEMO:
+            del _compressed[next(iter(_compressed))]
+    if owner:
+        try:
+            future.set_result(compress(data, kind))
+        except Exception as e:
+            with _compressed_lock:
+                _compressed.pop(key, None)
+            future.set_exception(e)
+    return future.result()
+
+def compressions(kinds=None) -> tuple:
+    """Dostępne rodzaje kompresji z `kinds` (domyślnie config.OUTPUT_PRECOMPRESS); "br" tylko z pakietem brotli."""
+    kinds = config.OUTPUT_PRECOMPRESS if kinds is None else kinds
+    return tuple(k for k in kinds if k != "br" or brotli is not None)
+
+def options() -> dict:
+    """Ustawienia post-processingu (wchodzą do hasha artefaktów w manifeście)."""
+    return {"minify": config.OUTPUT_MINIFY, "precompress": compressions(),
+            "min_bytes": config.OUTPUT_COMPRESS_MIN_BYTES}
+
+def process_file(path, reuse_dir=None, minify=None, kinds=None, min_bytes=None) -> dict:
+    """
+    Minifikuje plik `path` (HTML/CSS) w miejscu i zapisuje obok skompresowane kopie.
+    Jeśli w `reuse_dir` jest identyczny plik z kompletem kopii (np. plotly-<hash>.min.js
+    opublikowany wcześniej), kopie są stamtąd kopiowane zamiast kompresowane od nowa.
+
+    Zwraca {"file", "original", "minified", "gz", "br"} - rozmiary w bajtach
+    (brak klucza = kopia nie powstała).
+    """
+    minify = config.OUTPUT_MINIFY if minify is None else minify
+    kinds = compressions(kinds)
+    min_bytes = config.OUTPUT_COMPRESS_MIN_BYTES if min_bytes is None else min_bytes
+    name = os.path.basename(path)
+    ext = os.path.splitext(name)[1].lower()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    report = {"file": name, "original": len(data)}
+    if minify and ext in MINIFIERS:
+        data = MINIFIERS[ext](data.decode("utf-8")).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+    report["minified"] = len(data)
+
+    if ext not in COMPRESSIBLE or len(data) < min_bytes:
+        return report
+    published = os.path.join(reuse_dir, name) if reuse_dir else None
+    reusable = published is not None and same_content(path, published)
+    for kind in kinds:
+        target = f"{path}.{kind}"
+        if reusable and os.path.exists(f"{published}.{kind}"):
+            shutil.copyfile(f"{published}.{kind}", target)
+        else:
+            with open(target, "wb") as f:
+                f.write(compress_once(data, kind))
+        report[kind] = os.path.getsize(target)
+    return report
+
+def process_dir(path, reuse_dir=None) -> list[dict]:
+    """process_file dla każdego pliku w katalogu `path` (bez plików ukrytych, np. .htaccess)."""
+    reports = []
+    for name in sorted(os.listdir(path)):
+        full = os.path.join(path, name)
+        if name.startswith(".") or name.endswith(COMPRESSED_SUFFIXES) or not os.path.isfile(full):
+            continue
+        reports.append(process_file(full, reuse_dir))
+    return reports
+
+def describe(report) -> str:
+    """Jedna linia do logu: rozmiar przed/po minifikacji i kompresji."""
+    original, minified = report["original"], report["minified"]
+    parts = [f"{original} B"]
+    if minified != original:
+        parts.append(f"minified {minified} B")
+    parts += [f"{kind} {report[kind]} B" for kind in ("gz", "br") if kind in report]
+    smallest = min(report.get(kind, minified) for kind in ("gz", "br"))
+    saved = 100 * (1 - smallest / original) if original else 0
+    return f"{report['file']}: {', '.join(parts)} (-{saved:.0f}%)"
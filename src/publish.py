@@ -0,0 +1,82 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+
+STAGING_PREFIX = ".staging-"
+# skompresowane kopie plików (src.postprocess), które serwer wysyła zamiast oryginału
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+def file_hash(path, chunk=1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def same_content(a, b) -> bool:
+    if not os.path.exists(b) or os.path.getsize(a) != os.path.getsize(b):
+        return False
+    return file_hash(a) == file_hash(b)
+
+def staging_dir(output_path) -> str:
+    """
+    Tworzy katalog roboczy wewnątrz `output_path` (ten sam system plików,
+    więc os.replace do katalogu docelowego jest atomowe). Usuwa przy okazji
+    katalogi po przerwanych uruchomieniach starsze niż godzina.
+    """
+    now = time.time()
+    for name in os.listdir(output_path):
+        path = os.path.join(output_path, name)
+        if name.startswith(STAGING_PREFIX) and now - os.path.getmtime(path) > 3600:
+            shutil.rmtree(path, ignore_errors=True)
+    return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=output_path)
+
+def staged_files(staging):
+    """Pliki w `staging` i w jego podkatalogach (po jednym na artefakt) jako (nazwa, ścieżka)."""
+    files = []
+    for name in sorted(os.listdir(staging)):
+        path = os.path.join(staging, name)
+        if os.path.isdir(path):
+            files += [(f, os.path.join(path, f)) for f in sorted(os.listdir(path))]
+        else:
+            files.append((name, path))
+    return files
+
+def publish(staging, output_path) -> tuple[list, list]:
+    """
+    Przenosi wszystkie pliki ze `staging` (także z podkatalogów artefaktów) do
+    `output_path` atomowym os.replace. Pliki identyczne z tymi na dysku nie są
+    ruszane (mtime/ETag bez zmian, klienci dostają 304). Katalog `staging` jest
+    na końcu usuwany.
+    
+    Stare kopie .gz/.br opublikowanego pliku, dla których nie ma nowych
+    (np. po wyłączeniu kompresji), są usuwane - inaczej serwer wysyłałby starą treść.
+    
+    Zwraca (opublikowane, identyczne) - listy nazw plików.
+    """
+    published, identical = [], []
+    try:
+        files = staged_files(staging)
+        staged = {name for name, _ in files}
+        for name, src in files:
+            dst = os.path.join(output_path, name)
+            if name in published or same_content(src, dst):
+                # np. wspólny plotly-<hash>.min.js zapisany przez kilka wykresów
+                os.remove(src)
+                if name not in published and name not in identical:
+                    identical.append(name)
+            else:
+                os.replace(src, dst)
+                published.append(name)
+                for suffix in COMPRESSED_SUFFIXES:
+                    stale = dst + suffix
+                    if name + suffix not in staged and os.path.exists(stale):
+                        os.remove(stale)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return published, identical
+
+def discard(staging):
+    shutil.rmtree(staging, ignore_errors=True)
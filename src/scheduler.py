@@ -0,0 +1,48 @@
+from concurrent.futures import wait, FIRST_COMPLETED
+
+class DependencyFailed(Exception):
+    pass
+
+def run_graph(nodes: dict, pools: dict) -> tuple[dict, dict]:
+    """
+    Wykonuje graf zadań. Węzeł rusza, gdy tylko skończą się wszystkie jego zależności.
+    
+    nodes – {nazwa: {"func": f, "args": (...), "deps": [nazwy], "pool": nazwa puli}};
+            węzeł wywołuje f(*args, *wyniki_zależności) na executorze pools[pool]
+    pools – {nazwa puli: ThreadPoolExecutor / ProcessPoolExecutor}
+    
+    Błąd węzła nie przerywa pozostałych - jego zależne węzły dostają DependencyFailed.
+    Zwraca (wyniki, błędy): {nazwa: wynik}, {nazwa: wyjątek}.
+    """
+    results, errors = {}, {}
+    pending = dict(nodes)
+    running = {}
+
+    while pending or running:
+        for name, node in list(pending.items()):
+            deps = node.get("deps", ())
+            failed = [d for d in deps if d in errors or d not in nodes]
+            if failed:
+                errors[name] = DependencyFailed(f"{name}: dependency failed: {', '.join(failed)}")
+                del pending[name]
+            elif all(d in results for d in deps):
+                future = pools[node["pool"]].submit(node["func"], *node.get("args", ()),
+                                                    *(results[d] for d in deps))
+                running[future] = name
+                del pending[name]
+
+        if not running:
+            # zostały tylko węzły z cyklem w zależnościach
+            for name in pending:
+                errors[name] = DependencyFailed(f"{name}: dependency cycle")
+            break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                errors[name] = e
+
+    return results, errors
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+
+import config
+import src.publish as pub
+
+snapshot_root = os.path.join(config.WP_FOLDER, config.BACKUP_FOLDER)
+output_path = os.path.join(config.WP_FOLDER, config.PLOTS_FOLDER)
+
+# Historia opublikowanych plików, adresowana treścią:
+#   <snapshot_root>/objects/ab/abcdef...   treść pliku (sha256), zapisana raz - hardlink do
+#                                          opublikowanego pliku, kopia tylko gdy hardlink się nie da
+#   <snapshot_root>/snapshots/<id>.json    manifest: nazwa pliku -> hash (+ stat do pominięcia hashowania)
+# publish.publish podmienia pliki przez os.replace (nowy i-węzeł), więc hardlink w objects/
+# zachowuje starą treść.
+
+def objects_dir(root=None):
+    return os.path.join(root or snapshot_root, "objects")
+
+def snapshots_dir(root=None):
+    return os.path.join(root or snapshot_root, "snapshots")
+
+def object_path(h, root=None) -> str:
+    return os.path.join(objects_dir(root), h[:2], h)
+
+def list_snapshots(root=None) -> list[str]:
+    """Id snapshotów od najstarszego (id zaczyna się od czasu UTC, więc sortują się chronologicznie)."""
+    path = snapshots_dir(root)
+    if not os.path.isdir(path):
+        return []
+    return sorted(name[:-5] for name in os.listdir(path) if name.endswith(".json"))
+
+def load_snapshot(snapshot_id, root=None) -> dict:
+    with open(os.path.join(snapshots_dir(root), f"{snapshot_id}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def latest(root=None) -> dict | None:
+    ids = list_snapshots(root)
+    return load_snapshot(ids[-1], root) if ids else None
+
+def published_files(path) -> list[str]:
+    """Pliki w folderze wykresów (bez katalogów roboczych publish.staging_dir)."""
+    return sorted(name for name in os.listdir(path)
+                  if not name.startswith(pub.STAGING_PREFIX) and os.path.isfile(os.path.join(path, name)))
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def _store(src, h, root=None):
+    """Zapisuje treść `src` jako obiekt `h` (jeśli go jeszcze nie ma): hardlink, a gdy się nie da - kopia."""
+    dst = object_path(h, root)
+    if os.path.exists(dst):
+        return False
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return True
+
+def snapshot(path=None, root=None) -> dict:
+    """
+    Zapisuje stan folderu `path` (domyślnie folder wykresów) jako nowy snapshot.
+    Hashowane są tylko pliki, których rozmiar/mtime/i-węzeł zmienił się od ostatniego
+    snapshotu, a do objects/ trafiają tylko nowe treści. Jeśli nic się nie zmieniło,
+    nowy manifest nie powstaje.
+
+    Zwraca {"id", "files", "new_objects", "new_bytes", "unchanged"}.
+    """
+    path = path or output_path
+    last = latest(root)
+    last_files = last["files"] if last else {}
+    last_stat = last.get("stat", {}) if last else {}
+
+    files, stat, new_objects, new_bytes = {}, {}, 0, 0
+    for name in published_files(path):
+        full = os.path.join(path, name)
+        st = _stat(full)
+        h = last_files.get(name) if last_stat.get(name) == st else None
+        if h is None or not os.path.exists(object_path(h, root)):
+            h = pub.file_hash(full)
+            if _store(full, h, root):
+                new_objects += 1
+                new_bytes += st[0]
+        files[name], stat[name] = h, st
+
+    if last is not None and files == last_files:
+        if stat != last_stat:
+            # te same treści, inne i-węzły (np. po restore) - następnym razem bez hashowania
+            last["stat"] = stat
+            _write(last, root)
+        return {"id": last["id"], "files": len(files), "new_objects": 0, "new_bytes": 0, "unchanged": True}
+
+    digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:8]
+    now = time.time()
+    snap = {
+        "id": f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now % 1 * 1e6):06d}Z-{digest}",
+        "created": now,
+        "files": files,
+        "stat": stat,
+    }
+    _write(snap, root)
+    return {"id": snap["id"], "files": len(files), "new_objects": new_objects,
+            "new_bytes": new_bytes, "unchanged": False}
+
+def _write(snap, root=None):
+    os.makedirs(snapshots_dir(root), exist_ok=True)
+    dst = os.path.join(snapshots_dir(root), f"{snap['id']}.json")
+    tmp = f"{dst}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, indent=1, sort_keys=True)
+    os.replace(tmp, dst)
+
+def restore(snapshot_id, path=None, root=None, prune=False) -> tuple[list, list]:
+    """
+    Przywraca pliki ze snapshotu do folderu `path`: hardlinki obiektów trafiają do
+    katalogu roboczego i są publikowane przez publish.publish (atomowo, pliki
+    identyczne zostają nietknięte). Nic nie jest kopiowane ani hashowane od nowa.
+    prune=True usuwa też pliki, których w snapshocie nie było.
+
+    Zwraca (opublikowane, identyczne) jak publish.publish.
+    """
+    path = path or output_path
+    snap = load_snapshot(snapshot_id, root)
+    missing = [name for name, h in snap["files"].items() if not os.path.exists(object_path(h, root))]
+    if missing:
+        raise FileNotFoundError(f"Snapshot {snapshot_id}: missing objects for {', '.join(missing)}")
+
+    staging = pub.staging_dir(path)
+    try:
+        for name, h in snap["files"].items():
+            try:
+                os.link(object_path(h, root), os.path.join(staging, name))
+            except OSError:
+                shutil.copyfile(object_path(h, root), os.path.join(staging, name))
+    except Exception:
+        pub.discard(staging)
+        raise
+    published, identical = pub.publish(staging, path)
+    if prune:
+        for name in published_files(path):
+            if name not in snap["files"]:
+                os.remove(os.path.join(path, name))
+    return published, identical
+
+def prune_snapshots(keep=None, max_age=None, root=None) -> tuple[int, int]:
+    """
+    Retencja: zostaje `keep` najnowszych snapshotów (domyślnie config.SNAPSHOT_KEEP)
+    i wszystkie młodsze niż `max_age` sekund (config.SNAPSHOT_MAX_AGE). Obiekty,
+    do których nie odwołuje się już żaden snapshot, są usuwane.
+
+    Zwraca (usunięte snapshoty, usunięte obiekty).
+    """
+    keep = config.SNAPSHOT_KEEP if keep is None else keep
+    max_age = config.SNAPSHOT_MAX_AGE if max_age is None else max_age
+    ids = list_snapshots(root)
+    now = time.time()
+
+    removed = 0
+    for snapshot_id in ids[:max(0, len(ids) - keep)]:
+        if now - load_snapshot(snapshot_id, root).get("created", 0) > max_age:
+            os.remove(os.path.join(snapshots_dir(root), f"{snapshot_id}.json"))
+            removed += 1
+
+    removed_objects = 0
+    if removed:
+        used = set()
+        for snapshot_id in list_snapshots(root):
+            used.update(load_snapshot(snapshot_id, root)["files"].values())
+        for prefix in os.listdir(objects_dir(root)):
+            folder = os.path.join(objects_dir(root), prefix)
+            for h in os.listdir(folder):
+                if h not in used:
+                    os.remove(os.path.join(folder, h))
+                    removed_objects += 1
+    return removed, removed_objects
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historia opublikowanych wykresów (snapshoty adresowane treścią).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="lista snapshotów")
+    sub.add_parser("create", help="snapshot bieżącego folderu wykresów")
+    p = sub.add_parser("restore", help="przywrócenie snapshotu do folderu wykresów")
+    p.add_argument("snapshot_id", help="id snapshotu albo 'previous' (przedostatni)")
+    p.add_argument("--prune", action="store_true", help="usuń pliki, których nie było w snapshocie")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for snapshot_id in list_snapshots():
+            snap = load_snapshot(snapshot_id)
+            print(f"{snapshot_id}  {len(snap['files'])} files")
+    elif args.command == "create":
+        print(snapshot())
+    else:
+        snapshot_id = args.snapshot_id
+        if snapshot_id == "previous":
+            ids = list_snapshots()
+            if len(ids) < 2:
+                print("No previous snapshot")
+                return 1
+            snapshot_id = ids[-2]
+        published, identical = restore(snapshot_id, prune=args.prune)
+        print(f"Restored {snapshot_id}: {len(published)} files replaced, {len(identical)} unchanged")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import os
+import time
+import threading
+
+import config
+
+cache_folder = os.path.join(config.CACHE_FOLDER, "tabs")
+
+def cache_path(sheetId, gid):
+    return os.path.join(cache_folder, f"{sheetId}_{gid}.csv")
+
+def age(sheetId, gid):
+    """Wiek kopii w sekundach (None, jeśli nie ma jej w cache)."""
+    path = cache_path(sheetId, gid)
+    if not os.path.exists(path):
+        return None
+    return time.time() - os.path.getmtime(path)
+
+def get(sheetId, gid, ttl) -> bytes | None:
+    """Zwraca surowy CSV z cache, jeśli jest młodszy niż `ttl` sekund."""
+    a = age(sheetId, gid)
+    if a is None or a > ttl:
+        return None
+    with open(cache_path(sheetId, gid), "rb") as f:
+        return f.read()
+
+def get_stale(sheetId, gid, max_age=config.TAB_CACHE_RETENTION) -> bytes | None:
+    """Ostatnia dobra kopia niezależnie od TTL - fallback, gdy Google nie odpowiada."""
+    return get(sheetId, gid, max_age)
+
+def put(sheetId, gid, data: bytes):
+    os.makedirs(cache_folder, exist_ok=True)
+    path = cache_path(sheetId, gid)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # wątki puli pobierania mogą pisać tę samą zakładkę
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)  # mtime pliku = moment pobrania
+
+def ttl_for(name):
+    return config.TAB_CACHE_TTL.get(name, config.TAB_CACHE_TTL["default"])
+
+def evict(max_age=config.TAB_CACHE_RETENTION):
+    """Usuwa kopie starsze niż `max_age` sekund (i porzucone pliki .tmp)."""
+    if not os.path.isdir(cache_folder):
+        return []
+    removed = []
+    now = time.time()
+    for file in os.listdir(cache_folder):
+        path = os.path.join(cache_folder, file)
+        file_age = now - os.path.getmtime(path)
+        if file_age > max_age or (file.endswith(".tmp") and file_age > 3600):
+            os.remove(path)
+            removed.append(file)
+    return removed
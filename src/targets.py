@@ -0,0 +1,62 @@
+import config
+
+# Cele częściowej aktualizacji: nazwy artefaktów (config.ARTIFACT_TABS) albo zakładek.
+# Tylko config - app.py sprawdza nazwy i zwraca plan od razu, bez importu pandas/plotly
+# (te wczytuje dopiero zadanie w tle, patrz src/jobs.py).
+
+def plan(targets=None, tabs=None) -> dict:
+    """
+    Najmniejszy zakres aktualizacji dla `targets`: nazw artefaktów (np. "wyceny_tab")
+    albo zakładek (np. "wyceny" = wszystkie artefakty, które z niej powstają); None = wszystko.
+    Artefakty, których zakładek nie ma w `tabs` (domyślnie config.GIDS), są pomijane.
+    Nieznana nazwa albo pusta lista to ValueError.
+
+    Zwraca {"artifacts": [...], "tabs": {zakładka: gid}} - tylko zakładki potrzebne tym artefaktom.
+    """
+    tabs = config.GIDS if tabs is None else tabs
+    artifacts = config.ARTIFACT_TABS
+    available = [title for title, needs in artifacts.items() if all(tab in tabs for tab in needs)]
+    if targets is None:
+        selected = available
+    else:
+        check(targets, tabs)
+        wanted = set(targets)
+        selected = [title for title in available if title in wanted or wanted & set(artifacts[title])]
+    needed = {tab for title in selected for tab in artifacts[title]}
+    return {"artifacts": selected, "tabs": {name: gid for name, gid in tabs.items() if name in needed}}
+
+def check(targets, tabs):
+    """ValueError, gdy `targets` jest puste albo zawiera nazwę spoza artefaktów i zakładek `tabs`."""
+    if not targets:
+        raise ValueError("No targets given")
+    unknown = [t for t in targets if t not in config.ARTIFACT_TABS and t not in tabs]
+    if unknown:
+        raise ValueError(f"Unknown targets: {', '.join(unknown)} "
+                         f"(artifacts: {', '.join(config.ARTIFACT_TABS)}; tabs: {', '.join(tabs)})")
+
+def for_tabs(targets, tabs):
+    """Cele, które dotyczą portfela z zakładkami `tabs` (None = wszystko)."""
+    if targets is None:
+        return None
+    return [t for t in targets if t in config.ARTIFACT_TABS or t in tabs]
+
+def select_portfolios(names, portfolios=None) -> dict:
+    """Portfele z config.PORTFOLIOS (albo `portfolios`) o nazwach `names` (puste = wszystkie)."""
+    portfolios = config.PORTFOLIOS if portfolios is None else portfolios
+    if names:
+        unknown = [name for name in names if name not in portfolios]
+        if unknown:
+            raise ValueError(f"Unknown portfolios: {', '.join(unknown)}")
+        portfolios = {name: portfolios[name] for name in names}
+    return portfolios
+
+def portfolio_plan(targets=None, names=None, portfolios=None) -> dict:
+    """
+    plan dla każdego portfela: {portfel: {"artifacts": [...], "tabs": {...}}}.
+    Cel, którego nie zna żaden portfel, to ValueError.
+    """
+    portfolios = select_portfolios(names, portfolios)
+    tabs = {name: spec.get("gids") or config.GIDS for name, spec in portfolios.items()}
+    if targets is not None:
+        check(targets, {tab: None for gids in tabs.values() for tab in gids})
+    return {name: plan(for_tabs(targets, tabs[name]), tabs[name]) for name in portfolios}
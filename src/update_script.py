@@ -1,14 +1,27 @@
 import os
-import datetime
+import sys
+import time
+import argparse
 import pandas as pd
 
 import src.utils as u
 import src.plots as plots
 import src.colors as c
-from src.log_utils import log, weekly_backup
+import src.manifest as mf
+import src.publish as pub
+import src.postprocess as pp
+import src.scheduler as sched
+import src.tab_cache as tc
+import src.metrics as metrics
+import src.snapshots as snapshots
+import src.history as history
+import src.targets as tg
+from src.log_utils import log, debug, is_debug
 import config
 
 import traceback
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 
 wp_folder = config.WP_FOLDER
 plots_folder = config.PLOTS_FOLDER
@@ -20,95 +33,390 @@ dg = config.HOSSA_COL['dark_green']
 lg = config.HOSSA_COL['light_green']
 dr = config.HOSSA_COL['dark_red']
 
-backup_day = 5
+output_path = os.path.join(wp_folder, plots_folder)
 
-sheetId = os.environ.get("sheetId")
-if not sheetId:
-    raise ValueError("Environment variable sheetId not set!")
+def get_sheet_id():
+    # czytane przy uruchomieniu, nie przy imporcie (import modułu nie ma efektów ubocznych)
+    sheetId = os.environ.get("sheetId")
+    if not sheetId:
+        raise ValueError("Environment variable sheetId not set!")
+    return sheetId
 
-output_path = os.path.join(wp_folder, plots_folder)
-os.makedirs(output_path, exist_ok=True)
+def donut(df, val_col, label_col, colors_list, title, fontsize, path, **kwargs):
+    colors, cmap, norm = c.generate_colors(df, val_col, colors_list, to_hex=True)
+    plots.donut(df, val_col, label_col, colors, title=title, fontsize=fontsize, path=path, **kwargs)
+
+# sposób zapisu wykresów - też wchodzi do hasha, więc zmiana w config.py przebudowuje wykresy
+CHART_OPTS = {"plotlyjs": config.PLOTLYJS, "output": config.CHART_OUTPUT, "decimals": config.CHART_DECIMALS}
+
+# artefakt -> zakładki, z których powstaje (config.ARTIFACT_TABS), funkcja renderująca i jej parametry
+# (parametry wchodzą do hasha w manifeście, więc zmiana np. fontsize wymusza przebudowę)
+ARTIFACTS = {
+    "stopa-zwrotu": {
+        "tabs": config.ARTIFACT_TABS["stopa-zwrotu"],
+        "render": plots.horizontal_bars,
+        "params": {"val_col": "Stopa zwrotu", "label_col": "Nazwa", "colors": [dr, dg],
+                   "xlabel": "Stopa zwrotu", "fontsize": 13, **CHART_OPTS},
+    },
+    "udzial": {
+        "tabs": config.ARTIFACT_TABS["udzial"],
+        "render": donut,
+        "params": {"val_col": "Udział w portfelu", "label_col": "Nazwa",
+                   "colors_list": ['#ddeedd', '#224422'], "fontsize": 11, **CHART_OPTS},
+    },
+    "portfolio_vs_wig": {
+        "tabs": config.ARTIFACT_TABS["portfolio_vs_wig"],
+        "render": plots.portfolio_vs_wig,
+        "params": {"fontsize": 17, "height": 450, "max_points": config.WIG_MAX_POINTS,
+                   "incremental": config.WIG_INCREMENTAL, "chunk_rows": config.SERIES_CHUNK_ROWS,
+                   "chunk_fanout": config.SERIES_CHUNK_FANOUT, **CHART_OPTS},
+        # render dostaje reuse_dir=output_path i zwraca nazwy opublikowanych plików, których używa bez zapisu
+        "reuse_output": True,
+    },
+    "portfolio_tab": {
+        "tabs": config.ARTIFACT_TABS["portfolio_tab"],
+        "render": plots.table2html,
+        "params": {"fontsize": 14},
+    },
+    "wyceny_tab": {
+        "tabs": config.ARTIFACT_TABS["wyceny_tab"],
+        "render": plots.table2html,
+        "params": {"fontsize": 14, "link": "link (hidden)"},
+    },
+    "sums_tab": {
+        "tabs": config.ARTIFACT_TABS["sums_tab"],
+        "render": plots.vals2html,
+        "params": {"fontsize": 18},
+    },
+}
+
+# zakładki pobierane z retry na 'Ładuję...'
+FALLBACK_TABS = ("sums",)
+
+def load_tab(name, data) -> pd.DataFrame:
+    """
+    Surowy CSV zakładki -> DataFrame przygotowany do renderowania (typy kolumn z config.SCHEMAS).
+    Kolumny i wiersze są już ograniczone przy pobraniu (config.QUERIES).
+    """
+    schema = config.SCHEMAS.get(name)
+    if name == "sums":
+        df = u.readCsv(data, keep_default_na=False, schema=schema)
+        if is_debug():
+            debug(df.to_string().encode("ascii", "ignore").decode())
+        return df
+    return u.readCsv(data, schema=schema)
+
+# zakładki sparsowane w bieżącym uruchomieniu: (nazwa, bajty) -> Future z DataFrame
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+def parse_tab(name, data) -> pd.DataFrame:
+    """
+    load_tab raz na zakładkę w uruchomieniu: artefakty z tej samej zakładki (np. stopa-zwrotu
+    i udzial) dostają ten sam DataFrame, więc funkcje renderujące nie mogą go modyfikować.
+    Przy RENDER_EXECUTOR="process" każdy proces parsuje swoją kopię.
+    """
+    key = (name, data)
+    with _parsed_lock:
+        future = _parsed.get(key)
+        owner = future is None
+        if owner:
+            future = _parsed[key] = Future()
+    if owner:
+        try:
+            future.set_result(load_tab(name, data))
+        except Exception as e:
+            future.set_exception(e)
+    return future.result()
+
+def fetch_tab(sheetId, name, gid=None, scope=None, full=False) -> bytes:
+    """
+    Surowy CSV zakładki `name` (gid domyślnie z `gids`).
+    scope – prefiks nazw w metrykach (portfel w trybie wielu portfeli, src.batch)
+    full – zakładki z historią (config.HISTORY_TABS) pobierane w całości (--force)
+    """
+    gid = gid or gids[name]
+    with metrics.scope(scope):
+        if name in config.HISTORY_TABS:
+            # szereg czasowy: z arkusza tylko nowe dni, reszta z lokalnej historii
+            return history.fetch_history(sheetId, name, gid, config.HISTORY_TABS[name],
+                                         fallback=name in FALLBACK_TABS, query=config.QUERIES.get(name),
+                                         full=full, key=f"{sheetId}:{gid}")
+        return u.fetchTab(sheetId, name, gid, fallback=name in FALLBACK_TABS, query=config.QUERIES.get(name))
+
+def render_artifact(title, staging, manifest, force, output_path, *raw):
+    """
+    Węzeł renderujący grafu: jeśli wejścia artefaktu się zmieniły, renderuje go do
+    własnego podkatalogu `staging` i zwraca wpis do manifestu ("entry") razem
+    z czasami parsowania/renderowania i rozmiarem wyniku; inaczej zwraca None.
+    `output_path` to folder wykresów, do którego artefakt zostanie opublikowany.
+    (Czasy wracają w wyniku, bo przy RENDER_EXECUTOR="process" węzeł działa w innym procesie.)
+    """
+    spec = ARTIFACTS[title]
+    key = os.path.join(output_path, title)
+    h = mf.input_hash(title, raw, {**spec["params"], "postprocess": pp.options()})
+    if not force and mf.is_fresh(manifest, key, h, output_path):
+        return None
+
+    t0 = time.perf_counter()
+    path = os.path.join(staging, title)
+    os.makedirs(path)
+    frames = [parse_tab(tab, data) for tab, data in zip(spec["tabs"], raw)]
+    t1 = time.perf_counter()
+    if spec.get("reuse_output"):
+        reused = spec["render"](*frames, title=title, path=path, reuse_dir=output_path, **spec["params"])
+    else:
+        spec["render"](*frames, title=title, path=path, **spec["params"])
+        reused = []
+    t2 = time.perf_counter()
+    # minifikacja + kopie .gz/.br (kopie plików już opublikowanych bez zmian są brane z output_path)
+    sizes = pp.process_dir(path, reuse_dir=output_path)
+    t3 = time.perf_counter()
+
+    # pliki użyte z output_path (razem z ich kopiami .gz/.br) też należą do artefaktu
+    reused += [f"{name}{suffix}" for name in reused for suffix in pub.COMPRESSED_SUFFIXES
+               if os.path.exists(os.path.join(output_path, f"{name}{suffix}"))]
+    files = sorted(set(os.listdir(path)) | set(reused))
+    # bez wspólnych plików (plotly-<hash>.min.js, chart.html, ...)
+    own = [r for r in sizes if r["file"].startswith(f"{title}.")]
+    return {
+        "entry": mf.entry(h, files),
+        "parse_seconds": round(t1 - t0, 6),
+        "postprocess_seconds": round(t3 - t2, 6),
+        "seconds": round(t3 - t0, 6),
+        "bytes": sum(r["minified"] for r in own),
+        "original_bytes": sum(r["original"] for r in own),
+        **{f"{kind}_bytes": sum(r[kind] for r in own if kind in r) for kind in pp.compressions()},
+        "sizes": sizes,
+    }
+
+def plan(targets=None, tabs=None) -> dict:
+    """targets.plan z zakładkami `tabs` (domyślnie gids) - co pobrać, co przebudować."""
+    return tg.plan(targets, gids if tabs is None else tabs)
+
+def describe_plan(p, force=False) -> str:
+    """Plan z plan() do wypisania (--dry-run): co i jak zostanie pobrane, co przebudowane."""
+    lines = [f"Tabs to fetch ({len(p['tabs'])}):"]
+    for name, gid in p["tabs"].items():
+        if name in config.HISTORY_TABS:
+            how = "history: whole tab (force)" if force else "history: only rows since the last stored date"
+        else:
+            how = f"query {config.QUERIES[name]}" if name in config.QUERIES else "whole tab"
+            how += f", cache TTL {tc.ttl_for(name)} s"
+        if name in FALLBACK_TABS:
+            how += ", retried while 'Ładuję...'"
+        lines.append(f"  {name} (gid {gid}): {how}")
+    when = "always (force)" if force else "if their inputs changed"
+    lines.append(f"Artifacts to render {when} ({len(p['artifacts'])}): {', '.join(p['artifacts']) or 'none'}")
+    skipped = [title for title in ARTIFACTS if title not in p["artifacts"]]
+    lines.append(f"Untouched: {', '.join(skipped) or 'none'}")
+    return "\n".join(lines)
+
+def build_graph(sheetId, staging, manifest, force, tabs=None, output=None, prefix="", targets=None) -> dict:
+    """
+    Graf aktualizacji: węzeł "fetch:<zakładka>" na każdą potrzebną zakładkę z `tabs` (domyślnie gids)
+    i węzeł na każdy artefakt, zależny od pobrania zakładek, których używa
+    (artefakty z zakładkami spoza `tabs` są pomijane).
+    
+    output – folder wykresów (domyślnie output_path)
+    prefix – prefiks nazw węzłów, żeby grafy kilku portfeli (src.batch) dało się połączyć w jeden
+    targets – tylko te artefakty / zakładki (patrz plan)
+    """
+    p = plan(targets, tabs)
+    output = output or output_path
+    nodes = {}
+    for name, gid in p["tabs"].items():
+        nodes[f"{prefix}fetch:{name}"] = {"func": fetch_tab, "args": (sheetId, name, gid, prefix.rstrip("/") or None, force),
+                                          "pool": "fetch"}
+    for title in p["artifacts"]:
+        nodes[f"{prefix}{title}"] = {
+            "func": render_artifact,
+            "args": (title, staging, manifest, force, output),
+            "deps": [f"{prefix}fetch:{tab}" for tab in ARTIFACTS[title]["tabs"]],
+            "pool": "render",
+        }
+    return nodes
 
-def run_update():
-    log("=== Starting daily update ===")
+def take_snapshot(output=None, root=None):
+    """
+    Snapshot folderu wykresów (domyślnie output_path) + retencja. Błąd historii nie psuje aktualizacji
+    (pliki są już opublikowane) - trafia tylko do logu. Zwraca id snapshotu albo None.
+    """
+    try:
+        result = snapshots.snapshot(output or output_path, root)
+        removed, removed_objects = snapshots.prune_snapshots(root=root)
+    except Exception as e:
+        log(f"ERROR in snapshot: {type(e).__name__}: {e}", "error")
+        return None
+    if result["unchanged"]:
+        log(f"Snapshot: no changes since {result['id']}")
+    else:
+        log(f"Snapshot {result['id']}: {result['files']} files, {result['new_objects']} new "
+            f"({result['new_bytes']} B stored)")
+    if removed:
+        log(f"Snapshot retention: removed {removed} snapshots, {removed_objects} objects")
+    return result["id"]
 
+def run_graph(nodes, stagings, fetch_workers=None) -> tuple[dict, dict]:
+    """
+    Wykonuje graf aktualizacji na pulach pobierania (`fetch_workers` wątków, domyślnie
+    config.FETCH_WORKERS) i renderowania (config.RENDER_WORKERS wątków albo procesów,
+    config.RENDER_EXECUTOR). Gdy sam scheduler zawiedzie, katalogi robocze `stagings`
+    są usuwane. Zwraca (wyniki, błędy) węzłów.
+    """
+    RenderPool = ProcessPoolExecutor if config.RENDER_EXECUTOR == "process" else ThreadPoolExecutor
     try:
-        # Scrape data
-        df_tab = u.scrapeDfFromSpreadsheet(sheetId, gids['tab'])
-        df_stopa = u.scrapeDfFromSpreadsheet(sheetId, gids['stopa'])
-        df_sums = u.scrapeDfFromSpreadsheetFallback(sheetId, gids['sums']).iloc[:,1:-1]
-        df_wyceny = u.scrapeDfFromSpreadsheet(sheetId, gids['wyceny'])
-        df_wig = u.scrapeDfFromSpreadsheet(sheetId, gids['wig'])
-        
-        # --- Horizontal bar plot ---
-        title = "stopa-zwrotu"
-        val_col = "Stopa zwrotu"
-        label_col = "Nazwa"
-        fontsize = 13
-        colors_list = [dr, lg, dg]
-
-        colors, cmap, norm = c.generate_colors(df_stopa, val_col, colors_list)
-        plots.horizontal_bars(df_stopa, val_col, label_col, colors=[dr, dg], 
-                              title=title, xlabel=val_col, fontsize=fontsize, path=output_path)
-
-        # --- Donut plot ---
-        title = "udzial"
-        val_col = "Udział w portfelu"
-        label_col = "Nazwa"
-        fontsize = 11
-        colors_list = ['#ddeedd', '#224422']
-        colors, cmap, norm = c.generate_colors(df_stopa, val_col, colors_list, to_hex=True)
-        
-        path_donut = os.path.join(output_path, f"{title}.html")
-        
-        if os.path.exists(path_donut):
-            os.remove(path_donut)
-            log(f"Removed existing file: {path_donut}")
-            
-        plots.donut(df_stopa, val_col, label_col, colors, title=title, fontsize=fontsize, path=output_path)
-        log(f"Saved new plot: {path_donut}")
-
-        # --- Portfolio vs WIG plot ---
-        title = "portfolio_vs_wig"
-        path_wig = os.path.join(output_path, f"{title}.html")
-        fontsize = 17
-        if os.path.exists(path_wig):
-            os.remove(path_wig)
-            log(f"Removed existing file: {path_wig}")
-        plots.portfolio_vs_wig(df_wig, title=title, fontsize=fontsize, height=450, path=output_path)
-        log(f"Saved new plot: {path_wig}")
-
-        # --- Tables ---
-        df_wyceny = df_wyceny[df_wyceny['DCF'].astype(str).str.strip().ne("")]
-        
-        # print(df_sums)
-        log(df_sums.to_string().encode("ascii", "ignore").decode())
-
-        table_files = [
-            ("portfolio_tab.html", plots.table2html, df_tab, {"fontsize":14}),
-            ("wyceny_tab.html", plots.table2html, df_wyceny, {"fontsize":14, "link":"link (hidden)"}),
-            ("sums_tab.html", plots.vals2html, df_sums, {"fontsize":18})
-        ]
-
-        for filename, func, df, kwargs in table_files:
-            file_path = os.path.join(output_path, filename)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                log(f"Removed existing file: {file_path}")
-            func(df, title=filename.replace(".html",""), path=output_path, **kwargs)
-            log(f"Saved new plot: {file_path}")
-
-        log("All plots and tables saved successfully.")
-
-        today = datetime.datetime.today()
-        if today.weekday() == backup_day:
-            weekly_backup()
+        with ThreadPoolExecutor(max_workers=fetch_workers or config.FETCH_WORKERS) as fetch_pool, \
+             RenderPool(max_workers=config.RENDER_WORKERS) as render_pool:
+            results, errors = sched.run_graph(nodes, {"fetch": fetch_pool, "render": render_pool})
+    except Exception:
+        for staging in stagings:
+            pub.discard(staging)
+        raise
+    finally:
+        _parsed.clear()
+    tc.evict()
+    return results, errors
+
+def publish_results(results, errors, staging, manifest, output=None, prefix="") -> dict:
+    """
+    Publikuje artefakty jednego folderu wykresów (`output`, domyślnie output_path) z wyników
+    grafu: katalog roboczy `staging` -> folder wykresów, nowe wpisy do manifestu (zapisywanego
+    od razu), usunięcie plików, których przebudowane artefakty już nie mają.
+    prefix – prefiks nazw węzłów tego folderu w grafie (jak w build_graph)
+    
+    Zwraca {"rebuilt": [...], "unchanged": [...], "failed": [...], "error": None | str}.
+    """
+    output = output or output_path
+    tag = f"[{prefix.rstrip('/')}] " if prefix else ""
+    rebuilt, unchanged, failed = [], [], []
+
+    fetch_prefix = f"{prefix}fetch:"
+    fetched = {name[len(fetch_prefix):]: len(data) for name, data in results.items() if name.startswith(fetch_prefix)}
+    log(f"{tag}Fetched tabs: {', '.join(f'{k} ({v} B)' for k, v in fetched.items())}")
+    for name, e in errors.items():
+        if name.startswith(prefix):
+            log(f"ERROR in {name}: {type(e).__name__}: {e}", "error")
+
+    entries, sizes = {}, {}
+    for title in ARTIFACTS:
+        node = f"{prefix}{title}"
+        if node in errors:
+            failed.append(title)
+        elif node not in results:
+            continue  # artefakt spoza grafu (brak jego zakładek)
+        elif results[node] is None:
+            unchanged.append(title)
+        else:
+            result = dict(results[node])
+            entries[os.path.join(output, title)] = result.pop("entry")
+            for report in result.pop("sizes"):
+                sizes.setdefault(report["file"], report)
+            metrics.record("render", node, **result)
+            rebuilt.append(title)
+
+    published, identical = pub.publish(staging, output)
+    previous = {key: manifest.get(key) for key in entries}
+    for key, e in entries.items():
+        e["retired"] = mf.superseded(previous[key], e)
+    manifest.update(entries)
+    mf.save_manifest(manifest)
+    for name in published:
+        log(f"Saved new plot: {os.path.join(output, name)}")
+    for name in mf.orphans(manifest, previous, output):
+        # pliki zastąpione przy poprzedniej przebudowie (mf.superseded) - zostają tylko w snapshotach
+        if os.path.exists(os.path.join(output, name)):
+            os.remove(os.path.join(output, name))
+            log(f"Removed unused file: {os.path.join(output, name)}")
+    for name, report in sizes.items():
+        if name in published:
+            log(f"Size {pp.describe(report)}")
+    log(f"{tag}Rebuilt: {', '.join(rebuilt) or 'none'}; unchanged: {', '.join(unchanged) or 'none'}; "
+        f"identical output (not rewritten): {', '.join(identical) or 'none'}; "
+        f"failed: {', '.join(failed) or 'none'}")
+    error = None
+    if failed:
+        error = f"failed: {', '.join(failed)}"
+    else:
+        log(f"{tag}All plots and tables saved successfully.")
+    return {"rebuilt": rebuilt, "unchanged": unchanged, "failed": failed, "error": error}
+
+def run_update(force=False, on_stage=None, targets=None):
+    """
+    Pobiera zakładki i przebudowuje artefakty, których wejścia (bajty zakładek
+    + parametry) zmieniły się od ostatniego uruchomienia. force=True przebudowuje wszystko.
+    
+    Pobrania i renderowanie idą jednym grafem zależności (src.scheduler): artefakt
+    renderuje się, gdy tylko są jego zakładki, na config.RENDER_WORKERS wątkach
+    albo procesach (config.RENDER_EXECUTOR). Błąd jednego artefaktu nie zatrzymuje
+    pozostałych - opublikowane zostają te, które się udały.
+    
+    Po publikacji stan folderu wykresów trafia do historii (src.snapshots, config.SNAPSHOTS):
+    `python -m src.snapshots restore previous` cofa ostatnią publikację.
+    Wiele portfeli naraz (config.PORTFOLIOS): src.batch.run_batch.
+    
+    on_stage – opcjonalny callback wołany z nazwą etapu ("build", "publish", "snapshot")
+    targets – tylko te artefakty / zakładki (patrz plan): pobierane są tylko ich zakładki,
+              pozostałe artefakty zostają, jak są; None = wszystko
+    
+    Zwraca {"rebuilt": [...], "unchanged": [...], "failed": [...], "error": None | str,
+    "snapshot": id snapshotu | None}.
+    """
+    def stage(name):
+        metrics.mark_stage(name)
+        if on_stage is not None:
+            on_stage(name)
+
+    sheetId = get_sheet_id()
+    plan(targets)  # nieznane nazwy - ValueError, zanim cokolwiek ruszy
+    os.makedirs(output_path, exist_ok=True)
+
+    log("=== Starting daily update ===" if targets is None else f"=== Starting update: {', '.join(targets)} ===")
+    metrics.start_run()
+    summary = {"rebuilt": [], "unchanged": [], "failed": [], "error": None}
+    snapshot_id = None
+
+    try:
+        stage("build")
+        manifest = mf.load_manifest()
+        # wszystko renderujemy do katalogu roboczego, a publikujemy na końcu jednym krokiem
+        staging = pub.staging_dir(output_path)
+        results, errors = run_graph(build_graph(sheetId, staging, manifest, force, targets=targets), [staging])
+
+        stage("publish")
+        summary = publish_results(results, errors, staging, manifest)
+
+        if config.SNAPSHOTS:
+            stage("snapshot")
+            snapshot_id = take_snapshot()
 
     except Exception as e:
-        log("ERROR occurred during update!")
-        log(traceback.format_exc())
+        summary["error"] = f"{type(e).__name__}: {e}"
+        log("ERROR occurred during update!", "error")
+        log(traceback.format_exc(), "error")
 
+    summary["snapshot"] = snapshot_id
+    metrics.finish_run(**summary)
     log("=== Daily update completed ===")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aktualizacja wykresów i tabel z arkusza (sheetId ze zmiennej środowiskowej).")
+    parser.add_argument("targets", nargs="*",
+                        help="artefakty (np. wyceny_tab portfolio_vs_wig) albo zakładki (np. wyceny); domyślnie wszystko")
+    parser.add_argument("--force", action="store_true", help="przebuduj wybrane artefakty, nawet gdy wejścia się nie zmieniły")
+    parser.add_argument("--dry-run", action="store_true", help="tylko wypisz plan: zakładki do pobrania i artefakty do renderowania")
+    args = parser.parse_args(argv)
+    targets = args.targets or None
+    try:
+        p = plan(targets)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dry_run:
+        print(describe_plan(p, args.force))
+        return 0
+    summary = run_update(force=args.force, targets=targets)
+    return 1 if summary["error"] else 0
 
 if __name__ == "__main__":
-    run_update()
\ No newline at end of file
+    sys.exit(main())
@@ -4,13 +4,33 @@ import numpy as np
 import time
 import re
 import os
+import io
+import csv
+import json
+import random
+import hashlib
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 
-from lxml.etree import tostring
-from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson  # opcjonalnie: szybsze parsowanie odpowiedzi gviz
+except ImportError:
+    orjson = None
+
+import config
+import src.tab_cache as tc
+import src.metrics as metrics
+from src.log_utils import log
 
 # General utils
 def str2float(series: pd.Series) -> pd.Series: # df[col] = str2float(df[col])
+    if pd.api.types.is_numeric_dtype(series):
+        # kolumna otypowana już przy wczytaniu (config.SCHEMAS)
+        return series
     return (
         series.astype(str)
         .str.strip()
@@ -20,50 +40,402 @@ def str2float(series: pd.Series) -> pd.Series: # df[col] = str2float(df[col])
         .pipe(pd.to_numeric, errors="coerce")
     )
 
-def scrapeDfFromSpreadsheet(sheetId, gid):
-    url = f"https://docs.google.com/spreadsheets/d/{sheetId}/export?format=csv&gid={gid}"
-    df = pd.read_csv(url)
-    df = df.fillna("")
+def lttb_indices(x, y, n_out) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indeksy `n_out` punktów, które najlepiej
+    zachowują kształt linii (x, y). Pierwszy i ostatni punkt są zawsze zachowane.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out-2 kubełków między pierwszym a ostatnim punktem
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # pole trójkąta (poprzedni wybrany punkt, kandydat, średnia następnego kubełka)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+def downsample(df: pd.DataFrame, x_col, y_cols, max_points) -> pd.DataFrame:
+    """
+    Zmniejsza df do ~max_points wierszy (LTTB osobno dla każdej kolumny z `y_cols`,
+    suma indeksów) + minimum i maksimum każdej serii. Kolejność wierszy zachowana.
+    """
+    if not max_points or len(df) <= max_points:
+        return df
+    x = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype("int64")
+    x = x.to_numpy(dtype=float)
+
+    per_series = max(3, max_points // len(y_cols))
+    keep = set()
+    for col in y_cols:
+        y = df[col].to_numpy(dtype=float)
+        keep.update(lttb_indices(x, y, per_series).tolist())
+        keep.update((int(np.argmin(y)), int(np.argmax(y))))
+    return df.iloc[sorted(keep)]
+
+# HTTP - jedna sesja keep-alive współdzielona przez wszystkie pobrania
+_session = None
+_session_lock = threading.Lock()
+
+def getSession() -> requests.Session:
+    """
+    Zwraca współdzieloną sesję requests z pulą połączeń o rozmiarze config.FETCH_WORKERS
+    (przy wielu portfelach config.BATCH_FETCH_WORKERS), żeby kolejne zakładki nie otwierały nowego TLS.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            size = max(config.FETCH_WORKERS, config.BATCH_FETCH_WORKERS if config.PORTFOLIOS else 0)
+            adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def fetchCsv(url, session=None) -> bytes:
+    session = session or getSession()
+    response = session.get(url, timeout=config.FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+def _csv2float(series: pd.Series) -> pd.Series:
+    # str2float dla kolumny prosto z read_csv (same str albo NaN): bez astype(str) i strip,
+    # pd.to_numeric sam pomija spacje, a "", "-" itp. zamienia na NaN
+    if series.dtype != object:
+        return series.astype("float64")
+    return pd.to_numeric(
+        series.str.replace("%", "", regex=False).str.replace(",", ".", regex=False),
+        errors="coerce",
+    ).astype("float64")
+
+def applySchema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """
+    Nadaje kolumnom typy wg schematu zakładki (patrz config.SCHEMAS):
+    numeric/percent -> float64, date -> datetime64, category -> category, link -> str.
+    Kolumny spoza schematu (i bez "*") zostają bez zmian.
+    """
+    default = schema.get("*")
+    for col in df.columns:
+        kind = schema.get(col, default)
+        if kind is None:
+            continue
+        if kind in ("numeric", "percent"):
+            df[col] = _csv2float(df[col])
+        elif kind == "date":
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif kind == "category":
+            df[col] = df[col].fillna("").astype("category")
+        elif kind == "link":
+            df[col] = df[col].fillna("").astype(str).str.strip()
+        else:
+            raise ValueError(f"Unknown column type in schema: {col}: {kind}")
     return df
 
-import pandas as pd
-import time
+def readCsv(data: bytes, keep_default_na=True, schema=None) -> pd.DataFrame:
+    """
+    CSV -> DataFrame. Kolumny tekstowe mają "" zamiast NaN (keep_default_na=True),
+    a kolumny ze `schema` dostają typy od razu przy wczytaniu (applySchema) -
+    ich puste komórki zostają NaN/NaT.
+    """
+    df = pd.read_csv(io.BytesIO(data), keep_default_na=keep_default_na)
+    typed = []
+    if schema:
+        df = applySchema(df, schema)
+        typed = [col for col in df.columns if col in schema or "*" in schema]
+    if keep_default_na:
+        if typed:
+            untyped = df.columns.difference(typed, sort=False)
+            df[untyped] = df[untyped].fillna("")
+        else:
+            df = df.fillna("")
+    return df
+
+def csvUrl(sheetId, gid):
+    return f"{config.SHEETS_BASE_URL}/spreadsheets/d/{sheetId}/export?format=csv&gid={gid}"
+
+def scrapeDfFromSpreadsheet(sheetId, gid, session=None, schema=None):
+    return readCsv(fetchCsv(csvUrl(sheetId, gid), session), schema=schema)
+
+# 'Ładuję...' - placeholder Google Sheets, gdy formuły arkusza jeszcze się liczą (UTF-8, różna wielkość liter)
+LOADING_MARKERS = tuple(m.encode("utf-8") for m in ("Ładuję", "ładuję", "ŁADUJĘ"))
+
+class SheetLoading(Exception):
+    """Arkusz wciąż zwraca 'Ładuję...' po wszystkich próbach."""
+
+def hasLoading(data: bytes) -> bool:
+    return any(m in data for m in LOADING_MARKERS)
 
-def scrapeDfFromSpreadsheetFallback(sheetId, gid, retries=5, delay=2):
+def fetchCsvStream(url, session=None, timeout=None, chunk_size=64 * 1024) -> bytes | None:
     """
-    Scraper Google Sheets CSV z retry i fallbackiem na 'Ładuję...'
+    Jak fetchCsv, ale czyta odpowiedź kawałkami i przerywa pobieranie przy pierwszym
+    'Ładuję' w surowych bajtach - wtedy zwraca None (reszta odpowiedzi nie jest pobierana).
+    """
+    session = session or getSession()
+    overlap = max(len(m) for m in LOADING_MARKERS) - 1
+    with session.get(url, timeout=timeout or config.FETCH_TIMEOUT, stream=True) as response:
+        response.raise_for_status()
+        data = bytearray()
+        for chunk in response.iter_content(chunk_size):
+            # szukamy też na styku kawałków
+            if hasLoading(bytes(data[-overlap:]) + chunk):
+                metrics.incr("aborted_bytes", len(data) + len(chunk))
+                return None
+            data += chunk
+    return bytes(data)
+
+def fetchCsvFallback(sheetId, gid, retries=None, delay=None, session=None, max_delay=None, deadline=None,
+                     url=None) -> bytes:
+    """
+    Pobiera surowy CSV z Google Sheets z retry na 'Ładuję...'
     
-    retries – ile prób max
-    delay – ile sekund czekać między próbami
+    url – inny adres CSV tej zakładki (np. gviz z zapytaniem, patrz fetchQueryCsv); domyślnie eksport CSV
+    retries – ile prób max (domyślnie config.LOADING_RETRIES)
+    delay, max_delay – opóźnienie przed 2. próbą i jego górna granica; rośnie x2 co próbę,
+                       z jitterem (losowo od połowy do całości), domyślnie config.LOADING_DELAY / LOADING_MAX_DELAY
+    deadline – limit czasu wszystkich prób razem (s), domyślnie config.LOADING_DEADLINE
+    
+    Próba z 'Ładuję' jest przerywana już w trakcie pobierania (fetchCsvStream).
+    Gdy arkusz wciąż się ładuje po wszystkich próbach albo po deadline, rzuca SheetLoading.
     """
+    retries = retries or config.LOADING_RETRIES
+    delay = config.LOADING_DELAY if delay is None else delay
+    max_delay = config.LOADING_MAX_DELAY if max_delay is None else max_delay
+    deadline = config.LOADING_DEADLINE if deadline is None else deadline
+    end = time.monotonic() + deadline
 
-    base_url = f"https://docs.google.com/spreadsheets/d/{sheetId}/export?format=csv&gid={gid}"
+    base_url = url or csvUrl(sheetId, gid)
 
     for attempt in range(1, retries + 1):
+        metrics.incr("attempts")
         # cache-buster żeby wymusić świeże dane
         url = f"{base_url}&t={int(time.time())}"
 
-        df = pd.read_csv(url, keep_default_na=False)
+        remaining = end - time.monotonic()
+        data = fetchCsvStream(url, session, timeout=max(1, min(config.FETCH_TIMEOUT, remaining)))
+        if data is not None:
+            log(f"Scrape OK (attempt {attempt})")
+            return data
+
+        if attempt == retries:
+            break
+        wait = min(max_delay, delay * 2 ** (attempt - 1))
+        wait = random.uniform(wait / 2, wait)
+        if time.monotonic() + wait >= end:
+            log(f"[attempt {attempt}] Detected 'Laduję...' → deadline of {deadline}s reached", "warning")
+            break
+        log(f"[attempt {attempt}] Detected 'Laduję...' → retrying in {wait:.1f}s...")
+        time.sleep(wait)
 
-        # sprawdzamy czy gdzieś jest "Ładuję"
-        has_loading = df.astype(str).apply(
-            lambda col: col.str.contains("Ładuję", case=False, na=False)
-        ).any().any()
+    raise SheetLoading(f"gid {gid} still loading after {attempt} attempts")
 
-        if not has_loading:
-            print(f"Scrape OK (attempt {attempt})")
-            return df
+def scrapeDfFromSpreadsheetFallback(sheetId, gid, retries=None, delay=None, session=None):
+    """
+    Scraper Google Sheets CSV z retry na 'Ładuję...' (patrz fetchCsvFallback),
+    a gdy arkusz wciąż się ładuje - ostatnia dobra kopia z cache (tab_cache).
+    """
+    try:
+        data = fetchCsvFallback(sheetId, gid, retries, delay, session)
+    except SheetLoading:
+        data = tc.get_stale(sheetId, gid)
+        if data is None or hasLoading(data):
+            raise
+        log(f"WARNING: gid {gid} still loading → using cached copy from {tc.age(sheetId, gid):.0f}s ago", "warning")
+    else:
+        tc.put(sheetId, gid, data)
+    return readCsv(data, keep_default_na=False)
 
-        print(f"[attempt {attempt}] Detected 'Laduję...' → retrying in {delay}s...")
-        time.sleep(delay)
+def fetchTab(sheetId, name, gid, fallback=False, session=None, use_cache=True, query=None) -> bytes:
+    """
+    Surowy CSV jednej zakładki.
+    
+    fallback – pobieranie przez fetchCsvFallback ('Ładuję...')
+    query – kolumny / wiersze do pobrania (config.QUERIES, patrz fetchQueryCsv)
+    use_cache – kopia młodsza niż config.TAB_CACHE_TTL jest brana z dysku bez sieci,
+                a gdy Google zwróci błąd / timeout albo zakładka wciąż się ładuje
+                (SheetLoading), używana jest ostatnia dobra kopia
+    
+    Błąd zakładki bez kopii w cache jest rzucany dalej.
+    """
+    session = session or getSession()
+    # wynik zapytania ma w cache osobny plik, więc zmiana zapytania w config.py nie miesza kształtów
+    key = f"{gid}_{queryKey(query)}" if query else gid
 
-    # 🔴 fallback – po wszystkich próbach zwracamy co mamy
-    print("WARNING: Max retries reached → returning data WITH 'Laduję...'")
+    def download():
+        if query:
+            return fetchQueryCsv(sheetId, gid, query, session, fallback,
+                                 pushdown=config.QUERY_PUSHDOWN and name in config.QUERY_PUSHDOWN_TABS)
+        if fallback:
+            return fetchCsvFallback(sheetId, gid, session=session)
+        return fetchCsv(csvUrl(sheetId, gid), session)
 
-    return df
+    with metrics.timer("fetch", name) as m:
+        data = tc.get(sheetId, key, tc.ttl_for(name)) if use_cache else None
+        if data is not None:
+            log(f"Cache hit: {name}")
+            m["source"] = "cache"
+        else:
+            try:
+                data = download()
+                m["source"] = "network"
+            except Exception as e:
+                data = tc.get_stale(sheetId, key) if use_cache else None
+                if data is None or (fallback and hasLoading(data)):
+                    raise
+                log(f"WARNING: fetching {name} failed ({e!r}) → using cached copy "
+                    f"from {tc.age(sheetId, key):.0f}s ago", "warning")
+                m["source"] = "stale"
+                m["error"] = repr(e)
+            else:
+                if use_cache:
+                    tc.put(sheetId, key, data)
+        m["bytes"] = len(data)
+    return data
+
+def fetchTabs(sheetId, gids: dict, fallback=(), max_workers=None, session=None, use_cache=True,
+              queries=None) -> dict:
+    """
+    Pobiera równolegle surowe CSV wszystkich zakładek z `gids` przez jedną sesję
+    (każda przez fetchTab).
+    
+    fallback – nazwy zakładek pobieranych przez fetchCsvFallback ('Ładuję...')
+    queries – {nazwa: zapytanie} dla zakładek pobieranych z zapytaniem (patrz fetchQueryCsv)
+    max_workers – limit równoległych pobrań (domyślnie config.FETCH_WORKERS)
+    
+    Zwraca {nazwa: bytes}. Błąd którejkolwiek zakładki jest rzucany dalej.
+    """
+    max_workers = max_workers or config.FETCH_WORKERS
+    session = session or getSession()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(fetchTab, sheetId, name, gid, name in fallback, session, use_cache,
+                                     (queries or {}).get(name))
+                   for name, gid in gids.items()}
+        tabs = {name: future.result() for name, future in futures.items()}
+
+    if use_cache:
+        tc.evict()
+    return tabs
   
+# gviz (Visualization API): tabela jako JSON z typami kolumn i sformatowanymi wartościami
+class GvizError(Exception):
+    """Odpowiedź gviz ze statusem "error"."""
+
+GVIZ_DATE = re.compile(r"Date\((\d+),(\d+),(\d+)(?:,(\d+),(\d+),(\d+))?")
+
+def gvizUrl(sheetId, gid, out="json", tq="", headers=None):
+    # headers=1: pierwszy wiersz zakładki zawsze jako etykiety kolumn (bez zgadywania przez Google)
+    url = f"{config.SHEETS_BASE_URL}/spreadsheets/u/0/d/{sheetId}/gviz/tq?tqx=out:{out}&tq={tq}&gid={gid}"
+    return url if headers is None else f"{url}&headers={headers}"
+
+def parseGviz(data: bytes | str) -> dict:
+    """
+    Odpowiedź gviz out:json -> słownik "table" ({"cols": [...], "rows": [...]}).
+    Zdejmuje opakowanie JSONP: /*O_o*/ google.visualization.Query.setResponse({...});
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    start, end = data.find(b"{"), data.rfind(b"}")
+    if start < 0 or end < start:
+        raise GvizError(f"not a gviz response: {data[:100]!r}")
+    payload = memoryview(data)[start:end + 1]
+    response = orjson.loads(payload) if orjson is not None else json.loads(bytes(payload))
+    if response.get("status") == "error":
+        errors = "; ".join(e.get("detailed_message") or e.get("message", "") for e in response.get("errors", []))
+        raise GvizError(errors or "gviz error")
+    return response["table"]
+
+def _gvizDates(values) -> pd.Series:
+    # "Date(2024,0,5)" / "Date(2024,0,5,13,30,0)" - miesiące liczone od 0
+    parts = pd.Series(values, dtype=object).str.extract(GVIZ_DATE).astype("float64")
+    return pd.to_datetime(pd.DataFrame({
+        "year": parts[0], "month": parts[1] + 1, "day": parts[2],
+        "hour": parts[3].fillna(0), "minute": parts[4].fillna(0), "second": parts[5].fillna(0),
+    }), errors="coerce")
+
+def readGviz(data: bytes | str, headers=True, formatted=False, schema=None) -> pd.DataFrame:
+    """
+    Odpowiedź gviz out:json -> DataFrame od razu z typami kolumn podanymi przez Google:
+    number -> float64, date/datetime -> datetime64, boolean -> bool (None dla pustych),
+    string -> str ("" dla pustych).
+    
+    headers – nagłówki z etykiet kolumn ("label"); False: etykiety są pierwszym wierszem
+              (tak jak w out:html), a kolumny nazywają się 0..n-1
+    formatted – wszystkie kolumny jako tekst sformatowany jak w arkuszu ("f", np. "12,5%");
+                to samo co eksport CSV poza komórkami innego typu niż kolumna (patrz niżej)
+    schema – typy z config.SCHEMAS, nakładane na tekst sformatowany (tak jak u.readCsv)
+    
+    Uwaga: gviz zwraca null dla komórek innego typu niż większość kolumny
+    (np. "-" w kolumnie liczb), więc w odróżnieniu od CSV są one puste.
+    """
+    table = parseGviz(data)
+    cols, rows = table["cols"], table["rows"]
+    n = len(cols)
+    cells = [(r.get("c") or []) + [None] * (n - len(r.get("c") or [])) for r in rows]
+
+    labels = [col.get("label", "") for col in cols]
+    columns = {}
+    for i, col in enumerate(cols):
+        cell = [row[i] for row in cells]
+        if formatted or schema:
+            values = [("" if c is None or c.get("v") is None
+                       else c["f"] if "f" in c else str(c["v"])) for c in cell]
+            columns[i] = pd.Series(values, dtype=object)
+            continue
+        values = [None if c is None else c.get("v") for c in cell]
+        kind = col.get("type")
+        if kind == "number":
+            columns[i] = pd.Series(values, dtype="float64")
+        elif kind in ("date", "datetime"):
+            columns[i] = _gvizDates(values)
+        elif kind == "boolean":
+            columns[i] = pd.Series(values, dtype=object)
+        else:
+            columns[i] = pd.Series(["" if v is None else str(v) for v in values], dtype=object)
+
+    df = pd.DataFrame(columns)
+    if headers:
+        df.columns = labels
+        if schema:
+            df = applySchema(df, schema)
+    else:
+        df = pd.concat([pd.DataFrame([labels]), df], ignore_index=True)
+    return df
+
+def scrapeGvizFromSpreadsheet(sheetId, gid, headers=True, formatted=False, schema=None, session=None) -> pd.DataFrame:
+    """Zakładka przez gviz out:json (patrz readGviz)."""
+    return readGviz(fetchCsv(gvizUrl(sheetId, gid, headers=1), session), headers, formatted, schema)
+
 def scrapeDataFromSpreadsheet(sheetId, gid, headers = True) -> pd.DataFrame:
-    url = f'https://docs.google.com/spreadsheets/u/0/d/{sheetId}/gviz/tq?tqx=out:html&tq=&gid={gid}'
+    """
+    Zakładka jako tekst (wartości sformatowane jak w arkuszu) przez gviz out:json.
+    Dawny odczyt tabeli out:html przez BeautifulSoup: scrapeDataFromSpreadsheetHtml.
+    Różnica względem niego: komórki innego typu niż większość kolumny (np. "-" czy "brak"
+    w kolumnie liczb) są tu puste (""), bo gviz out:json zwraca dla nich null. Tekst 1:1
+    jak w arkuszu daje eksport CSV (fetchCsv(csvUrl(...)), tak pobiera run_update).
+    """
+    return scrapeGvizFromSpreadsheet(sheetId, gid, headers=headers, formatted=True)
+
+def scrapeDataFromSpreadsheetHtml(sheetId, gid, headers = True) -> pd.DataFrame:
+    from bs4 import BeautifulSoup  # tylko ta ścieżka potrzebuje bs4 + lxml
+
+    url = gvizUrl(sheetId, gid, out="html")
     html = requests.get(url).text
     soup = BeautifulSoup(html, 'lxml')
     
@@ -81,4 +453,115 @@ def scrapeDataFromSpreadsheet(sheetId, gid, headers = True) -> pd.DataFrame:
         df = pd.DataFrame(rows[1:], columns=rows[0])  # first row as headers
     else:
         df = pd.DataFrame(rows)
-    return df
\ No newline at end of file
+    return df
+
+# pushdown zapytań: Google zwraca tylko potrzebne kolumny i wiersze (gviz tq=, język zapytań Visualization API)
+_gvizColumns = {}
+_gvizColumnsLock = threading.Lock()
+
+def queryKey(query: dict) -> str:
+    return hashlib.sha1(json.dumps(query, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:12]
+
+def gvizColumns(sheetId, gid, session=None, refresh=False) -> list:
+    """
+    [(litera kolumny, nagłówek, typ), ...] zakładki - z zapytania `select * limit 0`
+    (same nagłówki i typy gviz, bez danych). Zapamiętywane w procesie, refresh=True pobiera od nowa.
+    """
+    key = (sheetId, str(gid))
+    with _gvizColumnsLock:
+        columns = None if refresh else _gvizColumns.get(key)
+    if columns is None:
+        table = parseGviz(fetchCsv(gvizUrl(sheetId, gid, tq=quote("select * limit 0"), headers=1), session))
+        columns = [(col["id"], col.get("label", ""), col.get("type", "string")) for col in table["cols"]]
+        with _gvizColumnsLock:
+            _gvizColumns[key] = columns
+    return columns
+
+def _queryColumns(query: dict, labels: list) -> list:
+    # pozycje kolumn wybranych przez zapytanie: "select" (nagłówki) albo "columns" ([od, do] jak w iloc)
+    if "select" in query:
+        missing = [col for col in query["select"] if col not in labels]
+        if missing:
+            raise GvizError(f"no such column: {', '.join(missing)}")
+        return [labels.index(col) for col in query["select"]]
+    if "columns" in query:
+        return list(range(len(labels)))[slice(*query["columns"])]
+    return list(range(len(labels)))
+
+def buildQuery(query: dict, columns: list) -> tuple[str, list]:
+    """
+    Zapytanie z config.QUERIES -> (tq, oczekiwane nagłówki wyniku).
+    columns – [(litera, nagłówek, typ), ...] z gvizColumns
+    """
+    ids, labels = [c[0] for c in columns], [c[1] for c in columns]
+    selected = _queryColumns(query, labels)
+    tq = "select " + ",".join(ids[i] for i in selected)
+    conditions = []
+    for col in query.get("not_empty", ()):
+        if col not in labels:
+            raise GvizError(f"no such column: {col}")
+        conditions.append(f"{ids[labels.index(col)]} is not null")
+    for col, since in query.get("since", {}).items():
+        if col not in labels:
+            raise GvizError(f"no such column: {col}")
+        i = labels.index(col)
+        since = pd.Timestamp(since)
+        # literał musi mieć typ kolumny; daty zapisane w arkuszu jako tekst nie dają się porównać
+        if columns[i][2] == "date":
+            conditions.append(f"{ids[i]} >= date '{since:%Y-%m-%d}'")
+        elif columns[i][2] == "datetime":
+            conditions.append(f"{ids[i]} >= datetime '{since:%Y-%m-%d %H:%M:%S}'")
+        else:
+            raise GvizError(f"column {col} is not a date ({columns[i][2]})")
+    if conditions:
+        tq += " where " + " and ".join(conditions)
+    return tq, [labels[i] for i in selected]
+
+def applyQuery(df: pd.DataFrame, query: dict) -> pd.DataFrame:
+    """To samo zapytanie lokalnie (gdy pushdown nie przejdzie) - na DataFrame z readCsv(keep_default_na=False)."""
+    for col in query.get("not_empty", ()):
+        df = df[df[col].notna() & df[col].astype(str).str.strip().ne("")]
+    for col, since in query.get("since", {}).items():
+        df = df[pd.to_datetime(df[col], errors="coerce") >= pd.Timestamp(since)]
+    labels = ["" if str(col).startswith("Unnamed: ") else col for col in df.columns]
+    return df.iloc[:, _queryColumns(query, labels)]
+
+def _csvHeader(data: bytes) -> list:
+    return next(csv.reader(io.StringIO(data[:data.find(b"\n") if b"\n" in data else None].decode("utf-8"))), [])
+
+def fetchQueryCsv(sheetId, gid, query: dict, session=None, fallback=False, pushdown=None) -> bytes:
+    """
+    CSV zakładki ograniczony zapytaniem `query` (config.QUERIES):
+      "select": [nagłówki] albo "columns": [od, do] (pozycje jak w iloc) – które kolumny,
+      "not_empty": [nagłówki] – tylko wiersze z niepustymi wartościami w tych kolumnach,
+      "since": {nagłówek: data} – tylko wiersze z datą >= `data` (kolumna z datami, np. src/history.py).
+    
+    Przy pushdown zapytanie idzie do Google jako tq= (gviz out:csv), z literami kolumn z gvizColumns.
+    Nagłówek wyniku jest sprawdzany - gdy kolumny się przesunęły, mapowanie jest pobierane
+    od nowa. Bez pushdown albo gdy się nie uda (błąd zapytania, zmienione nagłówki), pobierana
+    jest cała zakładka z eksportu CSV i zapytanie jest wykonywane lokalnie (applyQuery).
+    
+    fallback – pobieranie przez fetchCsvFallback ('Ładuję...')
+    pushdown – czy wysłać zapytanie do Google (domyślnie config.QUERY_PUSHDOWN); gviz zeruje
+               komórki innego typu niż większość kolumny, więc "not_empty" i zakładki
+               z 'Ładuję...' (fallback) są zawsze filtrowane lokalnie
+    """
+    def download(url=None):
+        if fallback:
+            return fetchCsvFallback(sheetId, gid, session=session, url=url)
+        return fetchCsv(url or csvUrl(sheetId, gid), session)
+
+    pushdown = config.QUERY_PUSHDOWN if pushdown is None else pushdown
+    if pushdown and not fallback and "not_empty" not in query:
+        try:
+            for refresh in (False, True):
+                tq, expected = buildQuery(query, gvizColumns(sheetId, gid, session, refresh))
+                data = download(gvizUrl(sheetId, gid, out="csv", tq=quote(tq), headers=1))
+                if _csvHeader(data) == expected:
+                    return data
+            raise GvizError(f"unexpected columns in query result: {_csvHeader(data)} (expected {expected})")
+        except (GvizError, requests.HTTPError) as e:
+            log(f"WARNING: query pushdown for gid {gid} failed ({e!r}) → filtering full tab locally", "warning")
+            metrics.incr("local_query")
+    df = applyQuery(readCsv(download(), keep_default_na=False), query)
+    return df.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+# config.py i pakiet src/ leżą w katalogu głównym repozytorium
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Względne ścieżki z config.py (cache/, log/) w katalogu tymczasowym testu."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def update_env(workdir, monkeypatch):
+    """
+    run_update na syntetycznym arkuszu z lokalnego zamiennika Google Sheets:
+    zwraca run(sheet, **kwargs) -> summary; sheet - {zakładka: DataFrame} (benchmarks.synthetic).
+    """
+    import contextlib
+    import io
+
+    import config
+    import src.update_script as us
+    from benchmarks import fake_sheets
+
+    gids = {name: str(i) for i, name in enumerate(config.GIDS)}
+    monkeypatch.setattr(config, "LOG_STDOUT", False)
+    monkeypatch.setattr(config, "TAB_CACHE_TTL", {"default": 0})
+    monkeypatch.setattr(config, "SNAPSHOTS", False)
+    monkeypatch.setenv("sheetId", "test")
+    monkeypatch.setattr(us, "gids", gids)
+    monkeypatch.setattr(us, "output_path", str(workdir / "plots"))
+
+    def run(sheet, **kwargs):
+        with fake_sheets.serve({gids[name]: df for name, df in sheet.items()}) as url:
+            monkeypatch.setattr(config, "SHEETS_BASE_URL", url)
+            with contextlib.redirect_stdout(io.StringIO()):
+                return us.run_update(**kwargs)
+
+    run.output = us.output_path
+    return run
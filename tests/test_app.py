@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+@pytest.mark.parametrize("url", ["/update/", "/update/,", "/update/nope", "/update/wig,nope"])
+def test_update_rejects_targets(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+def test_update_dry_run(client):
+    response = client.get("/update/wig?dry_run=1")
+    assert response.status_code == 200
+    assert response.get_json()["plan"]["artifacts"] == ["portfolio_vs_wig"]
+
+def test_update_check_skips_pandas():
+    # osobny proces - w tym pandas mogły już wczytać inne testy
+    code = ("import sys; from app import app; "
+            "assert app.test_client().get('/update/nope').status_code == 400; "
+            "assert 'pandas' not in sys.modules and 'plotly' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,45 @@
+import config
+import src.utils as u
+
+from benchmarks.synthetic import make_sheet
+
+def _spy(monkeypatch):
+    # zapytania, z którymi historia pobiera zakładkę wig (None = cała zakładka)
+    calls = []
+    fetch = u.fetchTab
+    def fetchTab(sheetId, name, *args, **kwargs):
+        if name == "wig":
+            calls.append(kwargs.get("query"))
+        return fetch(sheetId, name, *args, **kwargs)
+    monkeypatch.setattr(u, "fetchTab", fetchTab)
+    return calls
+
+def _sheet(full, rows):
+    sheet = dict(full)
+    sheet["wig"] = full["wig"].iloc[:rows].copy()
+    return sheet
+
+def test_run_within_interval_fetches_only_tail(update_env, monkeypatch):
+    full = make_sheet(400)
+    calls = _spy(monkeypatch)
+    update_env(_sheet(full, 300))
+    assert calls == [None]  # pierwsza synchronizacja - cała zakładka
+
+    calls.clear()
+    summary = update_env(_sheet(full, 303))
+    assert len(calls) == 1 and "since" in calls[0]
+    assert "portfolio_vs_wig" in summary["rebuilt"]
+
+def test_full_sync_after_interval_and_on_force(update_env, monkeypatch):
+    full = make_sheet(400)
+    calls = _spy(monkeypatch)
+    update_env(_sheet(full, 300))
+
+    calls.clear()
+    update_env(_sheet(full, 301), force=True)
+    assert calls == [None]
+
+    monkeypatch.setattr(config, "HISTORY_FULL_SYNC", 0)
+    calls.clear()
+    update_env(_sheet(full, 302))
+    assert calls == [None]
@@ -0,0 +1,46 @@
+import os
+import gzip
+import multiprocessing
+
+import config
+import src.log_utils as lu
+
+LINES = 200
+
+def _write_lines(path, tag):
+    # osobny proces jak worker Passengera: własny listener i handler, ten sam plik logu
+    config.LOG_STDOUT = False
+    config.LOG_MAX_BYTES = 4000
+    config.LOG_BACKUP_COUNT = 100
+    lu.log_file = path
+    for i in range(LINES):
+        lu.log(f"{tag} line {i:04d} " + "x" * 20)
+    lu.stop()  # proces z multiprocessing kończy się bez atexit
+
+def _read_all(folder):
+    lines = []
+    for name in os.listdir(folder):
+        full = os.path.join(folder, name)
+        if name.endswith(".gz"):
+            with gzip.open(full, "rt", encoding="utf-8") as f:
+                lines += f.read().splitlines()
+        elif not name.endswith(".lock"):
+            with open(full, encoding="utf-8") as f:
+                lines += f.read().splitlines()
+    return lines
+
+def test_rotation_keeps_lines_of_all_processes(workdir):
+    path = os.path.join(workdir, "log", "log.txt")
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_write_lines, args=(path, tag)) for tag in ("a", "b")]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(60)
+        assert p.exitcode == 0
+
+    lines = _read_all(os.path.dirname(path))
+    assert len([f for f in os.listdir(os.path.dirname(path)) if f.endswith(".gz")]) > 1  # były rotacje
+    for tag in ("a", "b"):
+        numbers = sorted(int(line.split()[-2]) for line in lines if f"] {tag} line " in line)
+        assert numbers == list(range(LINES))
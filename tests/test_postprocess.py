@@ -0,0 +1,76 @@
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from src import postprocess as pp
+
+@pytest.mark.parametrize("js, expected", [
+    # "/" po nazwie, ")" albo "++" to dzielenie, nie regex
+    ("var a = b / c / d;", "var a=b / c / d;"),
+    ("x = (a+b) / 2 // half\ny", "x=(a+b)/ 2\ny"),
+    ("i++ / 2", "i++ / 2"),
+    ("arr[i] /= 2;", "arr[i]/=2;"),
+    # regex po słowie kluczowym albo "(" - zostaje w całości, także "/" w klasie znaków
+    ("return /ab+c/gi.test(s)", "return /ab+c/gi.test(s)"),
+    ("var re = x.split(/\\s+/)", "var re=x.split(/\\s+/)"),
+    ("if (a) /x[/]y/.test(b)", "if(a)/x[/]y/.test(b)"),
+    # napisy bez zmian, także z cudzysłowem w środku
+    ("s = 'it\\'s'  +  \"q\"", "s='it\\'s' + \"q\""),
+    ("t = `a ${b}  c`", "t=`a ${b}  c`"),
+    # niezamknięty napis ciągnie się do końca - reszta zostaje nietknięta
+    ("s = 'unterminated\n  x = 1", "s='unterminated\n  x = 1"),
+    ("a = 1 /* note */ + 2", "a=1 + 2"),
+    # podział linii, na którym JS wstawiłby średnik, zostaje
+    ("return\nx", "return\nx"),
+    ("a\n(b)", "a\n(b)"),
+])
+def test_minify_js(js, expected):
+    assert pp.minify_js(js) == expected
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to check the script")
+def test_minify_js_plotly(tmp_path):
+    plotly = pytest.importorskip("plotly")
+    with open(os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js"), encoding="utf-8") as f:
+        js = f.read()
+    path = tmp_path / "plotly.js"
+    path.write_text(pp.minify_js(js), encoding="utf-8")
+    subprocess.run(["node", "--check", str(path)], check=True)
+
+@pytest.fixture
+def memo(monkeypatch):
+    """Pusta pamięć compress_once z licznikiem wywołań compress()."""
+    calls = []
+    compress = pp.compress
+    monkeypatch.setattr(pp, "_compressed", {})
+    monkeypatch.setattr(pp, "COMPRESSED_MEMO", 2)
+    monkeypatch.setattr(pp, "COMPRESSED_MEMO_MIN_BYTES", 100)
+    monkeypatch.setattr(pp, "compress", lambda data, kind: calls.append(data) or compress(data, kind))
+    return calls
+
+def test_compress_once_skips_small(memo):
+    small = b"x" * 99
+    pp.compress_once(small, "gz")
+    pp.compress_once(small, "gz")
+    assert len(memo) == 2 and not pp._compressed
+
+def test_compress_once_lru(memo):
+    a, b, c = (bytes([n]) * 100 for n in b"abc")
+    for data in (a, b, a, c):  # "a" użyte ponownie - wypada "b", najdłużej nieużywane
+        pp.compress_once(data, "gz")
+    assert memo == [a, b, c]
+    pp.compress_once(a, "gz")
+    pp.compress_once(b, "gz")
+    assert memo == [a, b, c, b]
+
+def test_compress_once_parallel(memo):
+    data = b"p" * 1000
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pp.compress_once(data, "gz"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(memo) == 1 and results == [pp.compress(data, "gz")] * 8
@@ -0,0 +1,44 @@
+import os
+import re
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from benchmarks.synthetic import make_sheet
+
+def _sheet(full, rows):
+    sheet = dict(full)
+    sheet["wig"] = full["wig"].iloc[:rows].copy()  # nowy DataFrame - fake_sheets cache'uje odpowiedzi po id()
+    return sheet
+
+def _chunks(output):
+    with open(os.path.join(output, "portfolio_vs_wig.tail.json"), encoding="utf-8") as f:
+        return set(json.load(f)["chunks"])
+
+def test_superseded_chunks_stay_until_next_rebuild(update_env):
+    full = make_sheet(300)
+    update_env(_sheet(full, 100))
+    before = _chunks(update_env.output)
+
+    update_env(_sheet(full, 180))  # małe paczki łączą się w większą
+    superseded = before - _chunks(update_env.output)
+    assert superseded
+    # strona otwarta przed publikacją (stary tail.json) nadal znajdzie swoje paczki
+    assert all(os.path.exists(os.path.join(update_env.output, name)) for name in superseded)
+
+    update_env(_sheet(full, 181))
+    assert not any(os.path.exists(os.path.join(update_env.output, name)) for name in superseded)
+    assert all(os.path.exists(os.path.join(update_env.output, name)) for name in _chunks(update_env.output))
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to check the page script")
+def test_loader_page_script(update_env, tmp_path):
+    update_env(_sheet(make_sheet(100), 100))
+    with open(os.path.join(update_env.output, "portfolio_vs_wig.html"), encoding="utf-8") as f:
+        html = f.read()
+    script = re.findall(r"<script>(.*?)</script>", html, re.S)[-1]
+    assert "no-cache" in script and ".catch(" in script
+    path = tmp_path / "loader.js"
+    path.write_text(script, encoding="utf-8")
+    subprocess.run(["node", "--check", str(path)], check=True)  # składnia po minifikacji